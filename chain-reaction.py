@@ -25,6 +25,35 @@ def get_args():
         action="store_true",
         help="Use c for processing",
     )
+    parser.add_argument(
+        "--ponder",
+        action="store_true",
+        help="Let the opponent think during your turn",
+    )
+    parser.add_argument(
+        "--book",
+        type=str,
+        default=None,
+        help="Opening book file built with opening-book.py",
+    )
+    parser.add_argument(
+        "--game-time",
+        type=float,
+        default=None,
+        help="Seconds the opponent may think in the whole game",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        default=None,
+        help="Write frame and move timings of the game to this json file",
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        default=None,
+        help="Write a Chrome trace of the game loop to this json file",
+    )
     parser.add_argument(
         "--startsecond",
         action="store_true",
@@ -53,10 +82,25 @@ def main():
     # configurations
     config1 = {}
     config2 = {
-        "minimax": {"search_depth": 1, "randomness": 3},
-        "mcts": {"time_limit": 1.0, "c_param": 1.5},
+        "minimax": {
+            "search_depth": 1,
+            "margin": 5,
+            "temperature": 4.0,
+            "ponder": args.ponder,
+        },
+        "mcts": {
+            "time_limit": 1.0,
+            "c_param": 1.5,
+            "ponder": args.ponder,
+        },
     }
 
+    # game clock instead of fixed time and depth per move
+    if args.game_time:
+        config2["minimax"]["search_depth"] = 4
+        config2["minimax"]["game_time"] = args.game_time
+        config2["mcts"]["game_time"] = args.game_time
+
     if args.startsecond:
         player_temp = player1
         config_temp = config1
@@ -69,7 +113,16 @@ def main():
 
     # start game with given parameters
     chain_reaction_game.start_game(
-        shape, backend, win_type, player1, player2, config1, config2
+        shape,
+        backend,
+        win_type,
+        player1,
+        player2,
+        config1,
+        config2,
+        args.book,
+        args.profile,
+        args.trace,
     )
 
 
@@ -0,0 +1,182 @@
+# Endgame Solver with Proof Number Search
+# Proves whether the player to move can force a win
+# OR nodes are attacker moves, AND nodes are defender moves
+
+
+import math
+
+import chain_reaction.wrappers.engine as engine
+
+
+# ------------ CONSTANTS -------------
+WIN = 1
+LOSS = -1
+UNKNOWN = 0
+
+
+# --------- UTILITY FUNCTIONS -----------
+def is_endgame(
+    board, player, max_enemy_cells, min_critical, min_orbs, eng=None
+) -> bool:
+    """
+    Whether the game is decided enough to try proving it
+    Needs min_orbs orbs per cell on board, then the enemy holds few cells
+    or many cells are about to explode
+    """
+
+    # orbs are never lost, so they count the plies played
+    # openings are never decided, however few cells the enemy holds
+    if sum([abs(cell) for cell in board]) < min_orbs * len(board):
+        return False
+
+    # setup
+    psign = -1 if player else 1
+    cmass = (eng or engine.ENGINE).cmass
+    friends, enemies, critical = 0, 0, 0
+
+    for idx, cell in enumerate(board):
+        friends += cell * psign > 0
+        enemies += cell * psign < 0
+        critical += abs(cell) == cmass[idx] - 1
+
+    occupied = friends + enemies
+    return enemies <= max_enemy_cells or critical >= min_critical * occupied
+
+
+class ProofNode:
+    def __init__(self, state, parent, index, player, is_or):
+        """
+        Proof Number Search Node
+        state is None if the game ended by reaching this node
+        """
+
+        self.state = state
+        self.index = index
+        self.player = player
+        self.is_or = is_or
+
+        self.parent = parent
+        self.children = None  # populated on expansion
+
+        # unexpanded frontier node
+        self.pn = 1
+        self.dn = 1
+
+    def set_terminal(self):
+        """ Game over after parent's move, mover wins """
+        if self.is_or:
+            self.pn, self.dn = math.inf, 0
+        else:
+            self.pn, self.dn = 0, math.inf
+
+    def expand(self, eng) -> int:
+        """
+        Generate all children of node, playing moves on eng
+        Returns number of nodes created
+        """
+        self.children = []
+        psign = -1 if self.player else 1
+
+        for idx in range(len(self.state)):
+
+            # skip invalid moves
+            if self.state[idx] * psign < 0:
+                continue
+
+            # interact with board
+            cboard = self.state[:]
+            game_over = eng.interact_inplace(cboard, idx, self.player)
+
+            # construct child
+            child = ProofNode(
+                None if game_over else cboard,
+                self,
+                idx,
+                1 - self.player,
+                not self.is_or,
+            )
+            self.children.append(child)
+
+            # one winning move decides the node
+            if game_over:
+                child.set_terminal()
+                break
+
+        self.update()
+        return len(self.children)
+
+    def update(self):
+        """ Recalculate proof and disproof numbers from children """
+        if self.is_or:
+            self.pn = min([c.pn for c in self.children])
+            self.dn = sum([c.dn for c in self.children])
+        else:
+            self.pn = sum([c.pn for c in self.children])
+            self.dn = min([c.dn for c in self.children])
+
+    def most_proving(self):
+        """ Descend to the frontier node that matters most """
+        node = self
+
+        while node.children is not None:
+            if node.is_or:
+                node = min(node.children, key=lambda c: c.pn)
+            else:
+                node = min(node.children, key=lambda c: c.dn)
+
+        return node
+
+    def proof_moves(self) -> dict:
+        """ Winning moves of all proven attacker nodes in subtree """
+        proof = {}
+        work = [self]
+
+        while work:
+            node = work.pop()
+            if node.pn != 0 or not node.children:
+                continue
+
+            # attacker needs one proven move, defender needs all
+            if node.is_or:
+                child = min(node.children, key=lambda c: c.pn)
+                proof[tuple(node.state)] = child.index
+                work.append(child)
+            else:
+                work.extend(node.children)
+
+        return proof
+
+
+# ------------- OUTER FUNCTION --------------------
+def solve(board: list, player: int, node_limit: int, eng=None) -> tuple:
+    """
+    Proof number search from board with player to move
+    Moves are played on eng, the selected engine if None
+    Returns (result, winning move, proof moves)
+    Result is UNKNOWN if node limit is exhausted
+    """
+
+    # setup
+    eng = eng or engine.ENGINE
+    rootnode = ProofNode(board, None, None, player, True)
+    created = 1
+
+    # expand most proving nodes until root is solved
+    while rootnode.pn != 0 and rootnode.dn != 0 and created < node_limit:
+        node = rootnode.most_proving()
+        created += node.expand(eng)
+
+        # update ancestors
+        node = node.parent
+        while node is not None:
+            node.update()
+            node = node.parent
+
+    # root decided
+    if rootnode.pn == 0:
+        move = min(rootnode.children, key=lambda c: c.pn).index
+        return (WIN, move, rootnode.proof_moves())
+    elif rootnode.dn == 0:
+        return (LOSS, None, {})
+    else:
+        return (UNKNOWN, None, {})
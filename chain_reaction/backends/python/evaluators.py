@@ -0,0 +1,107 @@
+# Leaf Evaluators for Tree Searches
+# An evaluator maps a batch of boards to values in [-1, 1],
+# each in favor of the player to move on that board
+# evaluate(boards, players, eng=None) -> list of values,
+# boards are played on eng, the selected engine if None
+
+
+import math
+import threading
+
+import chain_reaction.backends.python.minimax_agent as minimax_agent
+
+
+# ----------- CLASSES --------------
+class HeuristicEvaluator:
+    def __init__(self, scale=20.0):
+        """
+        Hand written evaluation as an evaluator
+        Squashes board score difference into [-1, 1]
+        """
+        self.scale = scale
+
+    def evaluate(self, boards, players, eng=None) -> list:
+        """ Values of boards in favor of players to move """
+        values = []
+
+        for board, player in zip(boards, players):
+            score = minimax_agent.board_score(board, player, eng)
+            score -= minimax_agent.board_score(board, 1 - player, eng)
+            values.append(math.tanh(score / self.scale))
+
+        return values
+
+
+class InferenceQueue:
+    def __init__(self, evaluator, batch_size, max_wait=0.002):
+        """
+        Batches Evaluations of Concurrent Searches
+        ------------------------------------------
+        - evaluator  - evaluator that runs the batches
+        - batch_size - positions evaluated together
+        - max_wait   - seconds to wait for a batch to fill
+        Searches call evaluate and block until their batch is done,
+        other searches keep descending the tree meanwhile
+        """
+
+        self.evaluator = evaluator
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+
+        # pending requests
+        self.cond = threading.Condition()
+        self.pending = []
+
+    def evaluate(self, boards, players, eng=None) -> list:
+        """ Same interface as evaluators, safe to call from threads """
+        request = {
+            "boards": boards,
+            "players": players,
+            "engine": eng,
+            "values": None,
+        }
+
+        with self.cond:
+            self.pending.append(request)
+            size = sum([len(r["boards"]) for r in self.pending])
+
+            # last caller to fill the batch runs it
+            if size >= self.batch_size:
+                self.run_batch()
+            else:
+                self.cond.wait_for(
+                    lambda: request["values"] is not None, self.max_wait
+                )
+
+            # batch did not fill in time
+            if request["values"] is None:
+                self.run_batch()
+
+        return request["values"]
+
+    def run_batch(self):
+        """
+        Evaluate all pending requests at once, lock must be held
+        Requests on different engines are evaluated in separate batches
+        """
+        pending, self.pending = self.pending, []
+
+        engines = []
+        for request in pending:
+            if request["engine"] not in engines:
+                engines.append(request["engine"])
+
+        for eng in engines:
+            batch = [r for r in pending if r["engine"] is eng]
+            boards = [b for r in batch for b in r["boards"]]
+            players = [p for r in batch for p in r["players"]]
+            values = self.evaluator.evaluate(boards, players, eng)
+
+            # hand results back to callers
+            start = 0
+            for request in batch:
+                end = start + len(request["boards"])
+                request["values"] = values[start:end]
+                start = end
+
+        self.cond.notify_all()
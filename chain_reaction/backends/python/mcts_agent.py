@@ -1,8 +1,19 @@
 import time
 import math
 import random
+import threading
 
 import chain_reaction.wrappers.engine as engine
+import chain_reaction.wrappers.symmetry as symmetry
+import chain_reaction.backends.python.evaluators as evaluators
+import chain_reaction.backends.python.minimax_agent as minimax_agent
+
+
+# ------------ CONSTANTS -------------
+SAMPLE_TRIES = 8
+HEURISTIC_BIAS = 0.75
+VIRTUAL_LOSS = 3
+TIMER_INTERVAL = 50
 
 
 # --------- UTILITY FUNCTIONS -----------
@@ -13,143 +24,573 @@ def uct_score(node, c_param) -> int:
     return exploit + c_param * explore
 
 
-def forward_roll_once(state, player) -> tuple:
+def truncated_winner(board, player, eng=None) -> int:
+    """ Decide unfinished game by static board evaluation """
+    score = minimax_agent.board_score(board, player, eng)
+    enemy_score = minimax_agent.board_score(board, 1 - player, eng)
+    return player if score >= enemy_score else 1 - player
+
+
+# --------- ROLLOUT POLICIES -----------
+def random_policy(board, player, rng=random, eng=None) -> int:
     """
-    Choose one action randomly and return next state tuple
-    If the action leads to game over, return None and winner
+    Uniformly random valid move
+    Samples indices instead of listing all valid moves
     """
+    psign = -1 if player else 1
+    size = len(board)
 
-    # rollout policy: random
-    valid_moves = engine.valid_board_moves(state, player)
-    chosen_move = random.choice(valid_moves)
+    # most cells are valid, so few samples are needed
+    for _ in range(SAMPLE_TRIES):
+        move = rng.randrange(size)
+        if board[move] * psign >= 0:
+            return move
 
-    # interact with env
-    next_state = state[:]
-    game_over = engine.interact_inplace(next_state, chosen_move, player)
+    # fall back to full list when enemy holds most cells
+    return rng.choice(engine.valid_board_moves(board, player))
 
-    if game_over:
-        return (None, player)
-    else:
-        return (next_state, 1 - player)
+
+def heuristic_policy(board, player, rng=random, eng=None) -> int:
+    """
+    Light heuristic move
+    Prefers explosions of own critical cells and empty corners
+    """
+    psign = -1 if player else 1
+    cmass = (eng or engine.ENGINE).cmass
+    valid, preferred = [], []
+
+    for idx, cell in enumerate(board):
+        orbs = cell * psign
+
+        # skip invalid moves
+        if orbs < 0:
+            continue
+
+        valid.append(idx)
+        maxcp = cmass[idx]
+
+        # critical cell or empty corner
+        if orbs == maxcp - 1 or (maxcp == 2 and orbs == 0):
+            preferred.append(idx)
+
+    if preferred and rng.random() < HEURISTIC_BIAS:
+        return rng.choice(preferred)
+    return rng.choice(valid)
+
+
+ROLLOUT_POLICIES = {"random": random_policy, "heuristic": heuristic_policy}
+
+
+# --------- PRIOR FUNCTIONS -----------
+def heuristic_prior(board, player, moves, eng=None) -> list:
+    """
+    Move priors for PUCT selection
+    Explosions and empty corners weigh double
+    """
+    psign = -1 if player else 1
+    cmass = (eng or engine.ENGINE).cmass
+    weights = []
+
+    for idx in moves:
+        orbs = board[idx] * psign
+        maxcp = cmass[idx]
+        preferred = orbs == maxcp - 1 or (maxcp == 2 and orbs == 0)
+        weights.append(2.0 if preferred else 1.0)
+
+    total = sum(weights)
+    return [w / total for w in weights]
+
+
+PRIOR_FUNCTIONS = {"uct": None, "puct": heuristic_prior}
 
 
 class MCTSVisitedNode:
-    def __init__(self, state, parent, index, player):
+    def __init__(
+        self, state, parent, index, player, prior_fn=None, rave_k=0, eng=None
+    ):
         """
         Visited MCTS Node Class
+        Child statistics are kept in flat lists for fast selection
+        With prior_fn, selection is PUCT instead of UCT
+        With rave_k, all-moves-as-first statistics are blended in
+        Moves are played on eng, the selected engine if None
         """
 
+        self.engine = eng or engine.ENGINE
         self.state = state
         self.index = index
         self.player = player
+        self.prior_fn = prior_fn
+        self.rave_k = rave_k
 
         self.parent = parent
+        self.slot = None  # index in parent's child lists
         self.children = []  # will be populated later
 
-        self.unvisited = engine.valid_board_moves(state, player) if state else []
+        # child statistics aligned with children
+        self.child_moves = []
+        self.child_visits = []
+        self.child_qscore = []
+        self.child_prior = []
+
+        # all-moves-as-first statistics indexed by move
+        self.amaf_visits = None
+        self.amaf_qscore = None
+        if rave_k and state:
+            self.amaf_visits = [0] * len(state)
+            self.amaf_qscore = [0] * len(state)
+
+        self.unvisited = (
+            symmetry.unique_moves(
+                state,
+                engine.valid_board_moves(state, player),
+                self.engine.shape,
+            )
+            if state
+            else []
+        )
         self.is_terminal = False if state else True
 
+        # untried actions sorted so that pop gives highest prior
+        self.unvisited_prior = None
+        if prior_fn and self.unvisited:
+            priors = prior_fn(state, player, self.unvisited, self.engine)
+            ranked = sorted(zip(priors, self.unvisited))
+            self.unvisited_prior = [p for p, _ in ranked]
+            self.unvisited = [m for _, m in ranked]
+
         self.visits = 0
         self.qscore = 0
+        self.log_visits = 0.0
+
+        # guards statistics and child lists in threaded search
+        self.lock = threading.Lock()
 
     def is_fully_expanded(self):
         return len(self.unvisited) == 0
 
-    def expand(self):
-        """ Construct child node from an untried action """
+    def expand(self, vloss=0):
+        """
+        Construct child node from an untried action
+        Child starts with vloss virtual losses in threaded search
+        """
 
         # select one action
         action = self.unvisited.pop()
+        prior = self.unvisited_prior.pop() if self.unvisited_prior else 0.0
 
         # perform action and get state and game over
         next_state = self.state[:]
-        game_over = engine.interact_inplace(next_state, action, self.player)
+        game_over = self.engine.interact_inplace(
+            next_state, action, self.player
+        )
         next_state = None if game_over else next_state
 
         # construct child node and add to children
-        child = MCTSVisitedNode(next_state, self, action, 1 - self.player)
+        child = MCTSVisitedNode(
+            next_state,
+            self,
+            action,
+            1 - self.player,
+            self.prior_fn,
+            self.rave_k,
+            self.engine,
+        )
+        child.visits, child.qscore = vloss, -vloss
+        child.slot = len(self.children)
         self.children.append(child)
+        self.child_moves.append(action)
+        self.child_visits.append(vloss)
+        self.child_qscore.append(-vloss)
+        self.child_prior.append(prior)
 
         return child
 
     def best_child(self, c_param):
         """
-        Choose child of node with maximum UCT score
-        Return None if there are no children
+        Choose child of node with maximum UCT or PUCT score
+        Return None if there are no children, or if an untried
+        action has a higher PUCT score than all children
         """
-        b_score = -math.inf
-        b_child = None
-
-        for child in self.children:
-            score = uct_score(child, c_param)
-            if score > b_score:
-                b_score = score
-                b_child = child
-
-        return b_child
-
-    def simulate(self):
+        visits = self.child_visits
+        qscore = self.child_qscore
+
+        # no children
+        if not visits:
+            return None
+
+        # exploitation, blended with AMAF values if enabled
+        if self.amaf_visits is None:
+            values = [q / v for q, v in zip(qscore, visits)]
+        else:
+            values = self.rave_values()
+
+        # UCT, exploration term shares cached parent log
+        if self.prior_fn is None:
+            explore = c_param * math.sqrt(self.log_visits)
+            scores = [
+                x + explore / math.sqrt(v) for x, v in zip(values, visits)
+            ]
+
+        # PUCT, untried actions score with zero value
+        else:
+            explore = c_param * math.sqrt(self.visits)
+            scores = [
+                x + explore * p / (1 + v)
+                for x, v, p in zip(values, visits, self.child_prior)
+            ]
+            if self.unvisited:
+                untried = explore * self.unvisited_prior[-1]
+                if untried > max(scores):
+                    return None
+
+        # argmax over flat list
+        return self.children[scores.index(max(scores))]
+
+    def rave_values(self) -> list:
+        """
+        Child values blended with AMAF values of their moves
+        AMAF weight fades as the child gets its own visits
+        """
+        rave_k = self.rave_k
+        amaf_visits, amaf_qscore = self.amaf_visits, self.amaf_qscore
+        values = []
+
+        for move, q, v in zip(
+            self.child_moves, self.child_qscore, self.child_visits
+        ):
+            a_v = amaf_visits[move]
+            if a_v == 0:
+                values.append(q / v)
+                continue
+
+            beta = math.sqrt(rave_k / (3 * v + rave_k))
+            values.append((1 - beta) * q / v + beta * amaf_qscore[move] / a_v)
+
+        return values
+
+    def simulate(
+        self, policy=random_policy, cutoff=0, played=None, rng=random
+    ):
         """
-        Play Random Games from Node
+        Play a game from node on one scratch board
+        Rollouts longer than cutoff plies are decided by board score
+        Moves of each player are added to played sets if given
+        Random moves are drawn from rng
         Returns winner of game
         """
 
-        state = self.state
-        player = self.player
-
-        # rollout till game over
-        while state is not None:
-            state, player = forward_roll_once(state, player)
+        # player who moved into terminal node won
+        if self.is_terminal:
+            return 1 - self.player
 
-        # return winner for backpropagation
-        return player
-
-    def backpropagate(self, reward):
+        # rollout inplace
+        board = self.state[:]
+        player = self.player
+        plies = 0
+
+        while True:
+            move = policy(board, player, rng, self.engine)
+            if played is not None:
+                played[player].add(move)
+            if self.engine.interact_inplace(board, move, player):
+                return player
+
+            player = 1 - player
+            plies += 1
+
+            # truncated rollout
+            if plies == cutoff:
+                return truncated_winner(board, player, self.engine)
+
+    def update(self, visits, qscore):
+        """ Add to statistics of node and its entry in parent lists """
+        with self.lock:
+            self.visits += visits
+            self.qscore += qscore
+            self.log_visits = math.log(self.visits, 10) if self.visits else 0
+
+        # mirror statistics in parent's child lists
+        parent = self.parent
+        if parent is not None:
+            with parent.lock:
+                parent.child_visits[self.slot] += visits
+                parent.child_qscore[self.slot] += qscore
+
+    def backpropagate(self, value, played=None, vloss=0):
         """
-        Update properties of node from reward
+        Update properties of node from value in favor of player 0
+        Scores are in favor of the player who moved into node
         Backpropagate from node to all ancestors
+        AMAF statistics are updated from played move sets
+        Virtual losses added during selection are removed
         """
         node = self
 
         while node is not None:
-            node.visits += 1
-            node.qscore += 1 if node.player == reward else -1
+            score = value if node.player else -value
+
+            # every later move of player to move counts as first move
+            if node.amaf_visits is not None:
+                amaf_score = -score
+                amaf_visits, amaf_qscore = node.amaf_visits, node.amaf_qscore
+                with node.lock:
+                    for move in played[node.player]:
+                        amaf_visits[move] += 1
+                        amaf_qscore[move] += amaf_score
+
+            # moves in tree are played after the parent node
+            if played is not None and node.parent is not None:
+                played[node.parent.player].add(node.index)
+
+            node.update(1 - vloss, score + vloss)
             node = node.parent
 
 
 class MCTSRootNode(MCTSVisitedNode):
-    def __init__(self, state, player):
-        super().__init__(state, None, None, player)
+    def __init__(self, state, player, prior_fn=None, rave_k=0, eng=None):
+        super().__init__(state, None, None, player, prior_fn, rave_k, eng)
+
+    @classmethod
+    def from_subtree(cls, node):
+        """ Promote a searched node to root, keeping its statistics """
+        root = cls.__new__(cls)
+        root.__dict__.update(vars(node))
+
+        # detach from old tree
+        root.parent = None
+        root.index = None
+        for child in root.children:
+            child.parent = root
+
+        return root
 
     def best_action(self):
         """ Best move using score for exploitation only """
-        return self.best_child(c_param=0.0).index
+        visits, qscore = self.child_visits, self.child_qscore
+        scores = [q / v for q, v in zip(qscore, visits)]
+        return self.children[scores.index(max(scores))].index
 
-    def tree_policy(self, c_param):
-        """ Select a node to run simulation on """
+    def tree_policy(self, c_param, vloss=0):
+        """
+        Select a node to run simulation on
+        Adds vloss virtual losses along the path, so that
+        concurrent searches spread over different nodes
+        """
         node = self
+        if vloss:
+            node.update(vloss, -vloss)
 
         # while node is fully_visited
         while not node.is_terminal:
-            if not node.is_fully_expanded():
-                return node.expand()
-            else:
-                node = node.best_child(c_param)
+            with node.lock:
+                # UCT tries every action once before selecting
+                if node.prior_fn is None and not node.is_fully_expanded():
+                    return node.expand(vloss)
+
+                # PUCT expands when an untried action scores best
+                child = node.best_child(c_param)
+                if child is None:
+                    return node.expand(vloss)
+
+            if vloss:
+                child.update(vloss, -vloss)
+            node = child
 
         # get unexplored node
         return node
 
+    def playout(
+        self, c_param, policy, cutoff, vloss=0, evaluator=None, rng=random
+    ):
+        """
+        Select, expand, simulate and backpropagate once
+        Leaves are valued by evaluator instead of rollout if given
+        Rollouts draw random moves from rng
+        """
+        played = [set(), set()] if self.rave_k else None
+        leafnode = self.tree_policy(c_param, vloss)
+
+        # rollouts also decide terminal leaves
+        if evaluator is None or leafnode.is_terminal:
+            winner = leafnode.simulate(policy, cutoff, played, rng)
+            value = 1 if winner == 0 else -1
+        else:
+            value = evaluator.evaluate(
+                [leafnode.state], [leafnode.player], leafnode.engine
+            )[0]
+            value = -value if leafnode.player else value
+
+        leafnode.backpropagate(value, played, vloss)
+
+    def playout_batch(self, c_param, evaluator, batch_size):
+        """
+        Select batch_size leaves and evaluate them together
+        Virtual loss spreads the leaves over the tree
+        """
+        leaves = [
+            self.tree_policy(c_param, VIRTUAL_LOSS) for _ in range(batch_size)
+        ]
+
+        # one evaluator call for all non terminal leaves
+        pending = [leaf for leaf in leaves if not leaf.is_terminal]
+        values = iter(
+            evaluator.evaluate(
+                [leaf.state for leaf in pending],
+                [leaf.player for leaf in pending],
+                self.engine,
+            )
+        )
+
+        for leafnode in leaves:
+            played = [set(), set()] if self.rave_k else None
+
+            # player who moved into terminal node won
+            if leafnode.is_terminal:
+                value = -1 if leafnode.player == 0 else 1
+            else:
+                value = next(values)
+                value = -value if leafnode.player else value
+
+            leafnode.backpropagate(value, played, VIRTUAL_LOSS)
+
+
+class MCTSPonderer:
+    def __init__(
+        self, rootnode, c_param, visit_limit, rollout, cutoff, rng=random
+    ):
+        """
+        Background Search on Opponent's Time
+        ------------------------------------
+        - rootnode    - board after our move, opponent to move
+        - c_param     - exploration parameter
+        - visit_limit - stop growing tree after these many visits
+        - rollout     - name of rollout policy
+        - cutoff      - rollout length limit (0 for full games)
+        - rng         - random generator of rollouts
+        """
+
+        self.rootnode = rootnode
+        self.c_param = c_param
+        self.visit_limit = visit_limit
+        self.policy = ROLLOUT_POLICIES[rollout]
+        self.cutoff = cutoff
+        self.rng = rng
+
+        # search thread
+        self.halted = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        """ Grow the tree until halted or visit limit is reached """
+        rootnode = self.rootnode
+
+        while not self.halted.is_set():
+            if rootnode.visits >= self.visit_limit:
+                return
+
+            rootnode.playout(
+                self.c_param, self.policy, self.cutoff, rng=self.rng
+            )
+
+    def stop(self, board=None, player=None):
+        """
+        Stop pondering and return the warm subtree for board
+        Return None if the opponent's reply was never explored
+        """
+        self.halted.set()
+        self.thread.join()
+
+        for child in self.rootnode.children:
+            if child.player == player and child.state == board:
+                return MCTSRootNode.from_subtree(child)
+
+        return None
+
 
 # ------------- OUTER FUNCTION --------------------
-def best_action(board: list, player, time_limit, c_param) -> int:
+def new_root(
+    board: list, player, selection="uct", rave_k=0, eng=None
+) -> MCTSRootNode:
+    """ Construct root node for selection rule uct or puct on eng """
+    prior_fn = PRIOR_FUNCTIONS[selection]
+    return MCTSRootNode(board, player, prior_fn, rave_k, eng)
+
+
+def best_action(
+    board: list,
+    player,
+    time_limit,
+    c_param,
+    rootnode=None,
+    rollout="random",
+    cutoff=0,
+    selection="uct",
+    rave_k=0,
+    threads=1,
+    evaluator=None,
+    batch_size=8,
+    rng=random,
+    playouts=0,
+    timer=None,
+    eng=None,
+) -> int:
+    """
+    Search within time_limit, stopping early after playouts if nonzero
+    Single threaded searches with a seeded rng and a playout limit
+    are reproducible, threads get streams derived from rng
+    A move timer of a game clock may stop the search earlier,
+    it is shown the best move every TIMER_INTERVAL playouts
+    A new tree is searched on eng, the selected engine if None
+    """
+
     # setup
     time_start = time.perf_counter()
-    rootnode = MCTSRootNode(board, player)
+    policy = ROLLOUT_POLICIES[rollout]
+    if rootnode is None:
+        rootnode = new_root(board, player, selection, rave_k, eng)
+    visit_limit = rootnode.visits + playouts if playouts else math.inf
+
+    # concurrent searches share evaluator batches
+    if evaluator is not None and threads > 1:
+        evaluator = evaluators.InferenceQueue(evaluator, batch_size)
 
     # time limited search
-    while time.perf_counter() - time_start < time_limit:
-        leafnode = rootnode.tree_policy(c_param)
-        reward = leafnode.simulate()
-        leafnode.backpropagate(reward)
+    halted = threading.Event()
+
+    def search(vloss, stream, timed):
+        count = 0
+        while time.perf_counter() - time_start < time_limit:
+            if rootnode.visits >= visit_limit or halted.is_set():
+                return
+
+            # one thread asks the move timer, all threads stop
+            count += 1
+            if timed and count % TIMER_INTERVAL == 0 and rootnode.children:
+                if timer.should_stop(rootnode.best_action()):
+                    halted.set()
+                    return
+
+            if evaluator is not None and threads == 1:
+                rootnode.playout_batch(c_param, evaluator, batch_size)
+            else:
+                rootnode.playout(
+                    c_param, policy, cutoff, vloss, evaluator, stream
+                )
+
+    # threads share one tree, kept apart by virtual loss
+    if threads > 1:
+        streams = [random.Random(rng.getrandbits(64)) for _ in range(threads)]
+        workers = [
+            threading.Thread(
+                target=search, args=(VIRTUAL_LOSS, stream, timer and not idx)
+            )
+            for idx, stream in enumerate(streams)
+        ]
+        [worker.start() for worker in workers]
+        [worker.join() for worker in workers]
+    else:
+        search(0, rng, timer is not None)
 
     return rootnode.best_action()
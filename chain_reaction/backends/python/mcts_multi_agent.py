@@ -0,0 +1,196 @@
+# Monte Carlo Tree Search for many players
+# Max^n style: every node is scored for the player who moved into it,
+# so each player picks the child that is best for themselves
+
+
+import time
+import math
+import random
+
+import chain_reaction.wrappers.engine as engine
+import chain_reaction.wrappers.multiplayer as multiplayer
+from chain_reaction.backends.python.mcts_agent import uct_score
+
+
+# --------- UTILITY FUNCTIONS -----------
+def forward_roll_once(
+    owners, counts, alive, turns, player, rng, eng
+) -> tuple:
+    """
+    Play one random move of rng inplace on owners and counts of eng
+    Returns (alive, turns, next player, game over)
+    """
+
+    # rollout policy: random
+    valid_moves = multiplayer.valid_board_moves(owners, player)
+    chosen_move = rng.choice(valid_moves)
+
+    # interact with env
+    game_over = multiplayer.interact_inplace(
+        owners, counts, chosen_move, player, eng
+    )
+    if game_over:
+        return (alive, turns + 1, player, True)
+
+    nxt, alive = multiplayer.next_player(owners, player, alive, turns + 1)
+    return (alive, turns + 1, nxt, False)
+
+
+class MCTSMultiNode:
+    def __init__(self, state, parent, index, player, mover, eng=None):
+        """
+        Visited MCTS Node Class for many players
+        ----------------------------------------
+        - state  - (owners, counts, alive, turns), None if game over
+        - player - player to move, or winner if game over
+        - mover  - player who moved into this node
+        - eng    - engine of the tree, the selected engine if None
+        """
+
+        self.state = state
+        self.engine = eng or engine.ENGINE
+        self.index = index
+        self.player = player
+        self.mover = mover
+
+        self.parent = parent
+        self.children = []  # will be populated later
+
+        self.unvisited = (
+            multiplayer.valid_board_moves(state[0], player) if state else []
+        )
+        self.is_terminal = False if state else True
+
+        self.visits = 0
+        self.qscore = 0
+
+    def is_fully_expanded(self):
+        return len(self.unvisited) == 0
+
+    def expand(self):
+        """ Construct child node from an untried action """
+
+        # select one action
+        action = self.unvisited.pop()
+
+        # perform action and get state and next player
+        res = multiplayer.interact_view(
+            self.state, action, self.player, self.engine
+        )
+        next_state, next_player, game_over = res
+        next_state = None if game_over else next_state
+
+        # construct child node and add to children
+        child = MCTSMultiNode(
+            next_state, self, action, next_player, self.player, self.engine
+        )
+        self.children.append(child)
+
+        return child
+
+    def best_child(self, c_param):
+        """
+        Choose child of node with maximum UCT score
+        Return None if there are no children
+        """
+        b_score = -math.inf
+        b_child = None
+
+        for child in self.children:
+            score = uct_score(child, c_param)
+            if score > b_score:
+                b_score = score
+                b_child = child
+
+        return b_child
+
+    def simulate(self, rng=random):
+        """
+        Play Random Games from Node
+        Random moves are drawn from rng
+        Returns winner of game
+        """
+
+        # winner is stored as player of terminal node
+        if self.is_terminal:
+            return self.player
+
+        # rollout on one scratch copy
+        owners, counts, alive, turns = self.state
+        owners, counts = owners[:], counts[:]
+        player = self.player
+        game_over = False
+
+        while not game_over:
+            alive, turns, player, game_over = forward_roll_once(
+                owners, counts, alive, turns, player, rng, self.engine
+            )
+
+        # return winner for backpropagation
+        return player
+
+    def backpropagate(self, reward):
+        """
+        Update properties of node from reward
+        Backpropagate from node to all ancestors
+        """
+        node = self
+
+        while node is not None:
+            node.visits += 1
+            node.qscore += 1 if node.mover == reward else -1
+            node = node.parent
+
+
+class MCTSMultiRootNode(MCTSMultiNode):
+    def __init__(self, state, player, eng=None):
+        super().__init__(state, None, None, player, None, eng)
+
+    def best_action(self):
+        """ Best move using score for exploitation only """
+        return self.best_child(c_param=0.0).index
+
+    def tree_policy(self, c_param):
+        """ Select a node to run simulation on """
+        node = self
+
+        # while node is fully_visited
+        while not node.is_terminal:
+            if not node.is_fully_expanded():
+                return node.expand()
+            else:
+                node = node.best_child(c_param)
+
+        # get unexplored node
+        return node
+
+
+# ------------- OUTER FUNCTION --------------------
+def best_action(
+    state: tuple,
+    player,
+    time_limit,
+    c_param,
+    rng=random,
+    playouts=0,
+    eng=None,
+) -> int:
+    """
+    Search within time_limit, stopping early after playouts if nonzero
+    Searches with a seeded rng and a playout limit are reproducible
+    State is played on eng, the selected engine if None
+    """
+
+    # setup
+    time_start = time.perf_counter()
+    rootnode = MCTSMultiRootNode(state, player, eng)
+
+    # time limited search
+    while time.perf_counter() - time_start < time_limit:
+        if playouts and rootnode.visits >= playouts:
+            break
+        leafnode = rootnode.tree_policy(c_param)
+        reward = leafnode.simulate(rng)
+        leafnode.backpropagate(reward)
+
+    return rootnode.best_action()
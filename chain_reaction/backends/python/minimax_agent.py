@@ -16,31 +16,44 @@
 
 
 import chain_reaction.wrappers.engine as engine
+import chain_reaction.wrappers.symmetry as symmetry
+
+
+# ---------- ON INIT ---------------
+# optional batched evaluator for horizon nodes (see evaluators.py)
+EVALUATOR = None
+EVAL_SCALE = 1000
+
+# plies of explosion moves searched beyond the horizon (0 disables)
+QUIESCENCE_DEPTH = 4
+
+# halt flag of searches given none, never set
+NOT_HALTED = bytes(1)
 
 
 # ------------ UTILITIES -------------
-def board_score(board, player) -> int:
-    """ Calculate board score in favor of player """
+def board_score(board, player, eng=None) -> int:
+    """ Calculate board score in favor of player (on selected engine) """
     # setup
-    size = len(board)
+    eng = eng or engine.ENGINE
     psign = -1 if player else 1
-    ntable = engine.NTABLE
+    ntable = eng.ntable
+    cmass = eng.cmass
     total_score = 0
 
     # cache tables for quick lookups
-    en_crit = [board[x] * psign == 1 - len(ntable[x]) for x in range(size)]
-    fr_crit = [board[x] * psign == len(ntable[x]) - 1 for x in range(size)]
+    orbs = [cell * psign for cell in board]
+    en_crit = [plr + cm == 1 for plr, cm in zip(orbs, cmass)]
+    fr_crit = [cm - plr == 1 for plr, cm in zip(orbs, cmass)]
 
-    for idx in range(size):
+    for idx, plr_orbs in enumerate(orbs):
         # multiplying psign makes player territories positive
-        plr_orbs = board[idx] * psign
-
         # player territory
         if plr_orbs > 0:
             # assign to local variable
             neighbrs = ntable[idx]
             is_critc = fr_crit[idx]
-            maxcp = len(neighbrs)
+            maxcp = cmass[idx]
 
             # number of surrounding critical enemies and friends
             crit_enemies = sum([en_crit[nid] for nid in neighbrs])
@@ -63,9 +76,124 @@ def board_score(board, player) -> int:
     return total_score
 
 
-def score_minimizer(board, player, alpha, beta) -> int:
+def explosion_moves(board, player, eng) -> list:
+    """ Moves of player that explode next to an enemy cell """
+
+    # setup
+    psign = -1 if player else 1
+    ntable = eng.ntable
+    cmass = eng.cmass
+    moves = []
+
+    for idx, cell in enumerate(board):
+        # critical cells of player only
+        if cell * psign != cmass[idx] - 1:
+            continue
+
+        # explosion captures an enemy cell
+        for nid in ntable[idx]:
+            if board[nid] * psign < 0:
+                moves.append(idx)
+                break
+
+    return moves
+
+
+def quiescence_maximizer(board, player, alpha, beta, depth, eng) -> int:
+    """ Maximizing Search over Explosions until Position is Quiet """
+
+    # standing pat on the static score
+    score = board_score(board, player, eng)
+    if depth == 0 or score >= beta:
+        return score
+    alpha = max(alpha, score)
+
+    for idx in explosion_moves(board, player, eng):
+
+        # prune immediately if game over
+        cboard = board[:]
+        if eng.interact_inplace(cboard, idx, player):
+            return 10000
+
+        # update score and alpha
+        score = max(
+            score,
+            quiescence_minimizer(cboard, player, alpha, beta, depth - 1, eng),
+        )
+        alpha = max(alpha, score)
+
+        # alpha-beta pruning
+        if alpha >= beta:
+            return score
+
+    return score
+
+
+def quiescence_minimizer(board, player, alpha, beta, depth, eng) -> int:
+    """ Minimizing Search over Explosions until Position is Quiet """
+
+    # standing pat on the static score
+    score = board_score(board, player, eng)
+    if depth == 0 or score <= alpha:
+        return score
+    beta = min(beta, score)
+
+    enemy = 1 - player
+    for idx in explosion_moves(board, enemy, eng):
+
+        # prune immediately if game over
+        cboard = board[:]
+        if eng.interact_inplace(cboard, idx, enemy):
+            return -10000
+
+        # update score and beta
+        score = min(
+            score,
+            quiescence_maximizer(cboard, player, alpha, beta, depth - 1, eng),
+        )
+        beta = min(beta, score)
+
+        # alpha-beta pruning
+        if alpha >= beta:
+            return score
+
+    return score
+
+
+def batch_score_minimizer(board, player, eng) -> int:
+    """ Minimizing Score Function with one evaluator batch """
+
+    # setup
+    enemy = 1 - player
+    esign = -1 if enemy else 1
+    children = []
+
+    # collect all valid replies
+    for idx in range(len(board)):
+
+        # skip invalid moves
+        if board[idx] * esign < 0:
+            continue
+
+        # prune immediately if game over
+        cboard = board[:]
+        if eng.interact_inplace(cboard, idx, enemy):
+            return -10000
+
+        children.append(cboard)
+
+    # evaluate together in favor of player
+    values = EVALUATOR.evaluate(children, [player] * len(children), eng)
+    return int(min(values) * EVAL_SCALE)
+
+
+def score_minimizer(board, player, alpha, beta, eng) -> int:
     """ Minimizing Score Function """
 
+    # batched evaluation replaces board score
+    if EVALUATOR is not None:
+        return batch_score_minimizer(board, player, eng)
+
     # setup
     enemy = 1 - player
     esign = -1 if enemy else 1
@@ -80,11 +208,13 @@ def score_minimizer(board, player, alpha, beta) -> int:
 
         # prune immediately if game over
         cboard = board[:]
-        if engine.interact_inplace(cboard, idx, enemy):
+        if eng.interact_inplace(cboard, idx, enemy):
             return -10000
 
-        # get child score
-        cscore = board_score(cboard, player)
+        # get child score, resolving explosions first
+        cscore = quiescence_maximizer(
+            cboard, player, alpha, beta, QUIESCENCE_DEPTH, eng
+        )
 
         # update
         score = min(score, cscore)
@@ -97,8 +227,15 @@ def score_minimizer(board, player, alpha, beta) -> int:
     return score
 
 
-def pruned_minimizer(board, player, alpha, beta, depth) -> int:
-    """ Minimizing Tree Search Function """
+def pruned_minimizer(board, player, alpha, beta, depth, eng, halted) -> int:
+    """
+    Minimizing Tree Search Function
+    Returns early with a meaningless score once halted[0] is set
+    """
+
+    # search was halted
+    if halted[0]:
+        return 0
 
     # setup
     enemy = 1 - player
@@ -107,7 +244,7 @@ def pruned_minimizer(board, player, alpha, beta, depth) -> int:
 
     # max depth reached
     if depth == 0:
-        return score_minimizer(board, player, alpha, beta)
+        return score_minimizer(board, player, alpha, beta, eng)
 
     # searching all valid nodes
     for idx in range(len(board)):
@@ -118,11 +255,13 @@ def pruned_minimizer(board, player, alpha, beta, depth) -> int:
 
         # prune immediately if game over
         cboard = board[:]
-        if engine.interact_inplace(cboard, idx, enemy):
+        if eng.interact_inplace(cboard, idx, enemy):
             return -10000
 
         # get child score
-        cscore = pruned_maximizer(cboard, player, alpha, beta, depth)
+        cscore = pruned_maximizer(
+            cboard, player, alpha, beta, depth, eng, halted
+        )
 
         # update
         score = min(score, cscore)
@@ -135,7 +274,7 @@ def pruned_minimizer(board, player, alpha, beta, depth) -> int:
     return score
 
 
-def pruned_maximizer(board, player, alpha, beta, depth) -> int:
+def pruned_maximizer(board, player, alpha, beta, depth, eng, halted) -> int:
     """ Maximizing Tree Search Function """
 
     # setup
@@ -151,12 +290,15 @@ def pruned_maximizer(board, player, alpha, beta, depth) -> int:
 
         # prune immediately if game over
         cboard = board[:]
-        if engine.interact_inplace(cboard, idx, player):
+        if eng.interact_inplace(cboard, idx, player):
             return 10000
 
         # update score and beta
         score = max(
-            score, pruned_minimizer(cboard, player, alpha, beta, depth - 1)
+            score,
+            pruned_minimizer(
+                cboard, player, alpha, beta, depth - 1, eng, halted
+            ),
         )
         alpha = max(alpha, score)
 
@@ -168,14 +310,24 @@ def pruned_maximizer(board, player, alpha, beta, depth) -> int:
 
 
 # ---------- OUTER FUNCTION --------------
-def load_scores(board, player, depth) -> list:
-    """ Get the scores of all moves of board """
+def load_scores(board, player, depth, margin=0, eng=None, halted=None):
+    """
+    Get the scores of all moves of board on eng (selected engine if None)
+    Root alpha trails the best score by margin + 1, so scores within
+    margin of the best (inclusive) are exact and the rest upper bounds
+    Scores are meaningless once halted[0] (a bytearray flag) is set
+    """
 
     # setup
+    eng = eng or engine.ENGINE
+    halted = NOT_HALTED if halted is None else halted
     alpha = -10000
     psign = -1 if player else 1
     score_list = [0] * len(board)
 
+    # symmetric moves share scores
+    reps = symmetry.move_representatives(board, eng.shape)
+
     # searching all nodes (conditional return inside)
     for idx in range(len(board)):
 
@@ -184,9 +336,14 @@ def load_scores(board, player, depth) -> list:
             score_list[idx] = -20000
             continue
 
+        # copy score of equivalent move searched earlier
+        if reps and reps[idx] != idx:
+            score_list[idx] = score_list[reps[idx]]
+            continue
+
         # interact with board
         cboard = board[:]
-        game_over = engine.interact_inplace(cboard, idx, player)
+        game_over = eng.interact_inplace(cboard, idx, player)
 
         # mark winning move (no use of other scores)
         if game_over:
@@ -194,8 +351,124 @@ def load_scores(board, player, depth) -> list:
             return score_list
 
         # store score and update alpha
-        score = pruned_minimizer(cboard, player, alpha, 10000, depth - 1)
+        score = pruned_minimizer(
+            cboard, player, alpha, 10000, depth - 1, eng, halted
+        )
         score_list[idx] = score
-        alpha = max(alpha, score)
+        alpha = max(alpha, score - margin - 1)
+
+    return score_list
+
+
+# ---------- PARALLEL ROOT --------------
+# root moves are spread over a process pool created with pool_init,
+# workers share the best root score found so far, alpha trails it by
+# margin + 1
+# workers also share a halt flag, raised while the search owning the
+# pool is halted
+SHARED_ALPHA = None
+SHARED_HALTED = None
+HALT_POLL = 0.005
+
+
+def pool_init(shape, alpha, halted, evaluator, quiescence_depth):
+    """ Initialize worker processes of a root splitting pool """
+    global SHARED_ALPHA, SHARED_HALTED, EVALUATOR, QUIESCENCE_DEPTH
+
+    engine.init(shape)
+    SHARED_ALPHA = alpha
+    SHARED_HALTED = halted
+    EVALUATOR = evaluator
+    QUIESCENCE_DEPTH = quiescence_depth
+
+
+def root_move_score(args) -> tuple:
+    """ Search one root move in a worker, returns (move, score) """
+
+    cboard, player, idx, depth, margin, shape = args
+
+    # search was halted
+    if SHARED_HALTED[0]:
+        return (idx, 0)
+
+    # latest best score of all workers
+    alpha = max(SHARED_ALPHA.value - margin - 1, -10000)
+    eng = engine.get_engine(shape)
+    score = pruned_minimizer(
+        cboard, player, alpha, 10000, depth - 1, eng, SHARED_HALTED
+    )
+
+    # raise shared alpha for moves searched later
+    with SHARED_ALPHA.get_lock():
+        if score > SHARED_ALPHA.value:
+            SHARED_ALPHA.value = score
+
+    return (idx, score)
+
+
+def load_scores_parallel(
+    board,
+    player,
+    depth,
+    pool,
+    alpha,
+    pool_halted,
+    margin=0,
+    eng=None,
+    halted=None,
+):
+    """
+    Get the scores of all moves of board, exact within margin of best
+    Root moves are searched in pool created with shared alpha value and
+    halt flag, halted[0] is passed on to the pool while waiting
+    Note: Only one search may use a pool at a time
+    """
+    import multiprocessing
+
+    # setup
+    eng = eng or engine.ENGINE
+    halted = NOT_HALTED if halted is None else halted
+    psign = -1 if player else 1
+    score_list = [0] * len(board)
+    reps = symmetry.move_representatives(board, eng.shape)
+    tasks = []
+
+    for idx in range(len(board)):
+
+        # mark invalid moves
+        if board[idx] * psign < 0:
+            score_list[idx] = -20000
+            continue
+
+        # equivalent moves are copied below
+        if reps and reps[idx] != idx:
+            continue
+
+        # mark winning move (no use of other scores)
+        cboard = board[:]
+        if eng.interact_inplace(cboard, idx, player):
+            score_list[idx] = 10000
+            return score_list
+
+        tasks.append((cboard, player, idx, depth, margin, eng.shape))
+
+    # search all root moves in workers
+    alpha.value = -10000
+    pool_halted[0] = 0
+    results = pool.imap_unordered(root_move_score, tasks)
+
+    for _ in tasks:
+        while True:
+            try:
+                idx, score = results.next(HALT_POLL)
+                break
+            except multiprocessing.TimeoutError:
+                pool_halted[0] = halted[0]
+        score_list[idx] = score
+
+    # copy scores of equivalent moves
+    for idx in range(len(board)):
+        if reps and reps[idx] != idx and score_list[idx] != -20000:
+            score_list[idx] = score_list[reps[idx]]
 
     return score_list
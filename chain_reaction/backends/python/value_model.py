@@ -0,0 +1,91 @@
+# Value Network Evaluator in plain NumPy
+# Runs on CPU in batches, weights are stored as .npz archives
+# with arrays w0, b0, w1, b1 ... for each dense layer
+
+
+import numpy as np
+
+import chain_reaction.wrappers.engine as engine
+
+
+# ----------- CLASSES --------------
+class NumpyValueModel:
+    def __init__(self, weights: list, shape=None):
+        """
+        Dense Value Network
+        -------------------
+        - weights - list of (matrix, bias) for each layer
+        - shape   - board shape of inputs, the selected shape if None
+        Hidden layers use relu, output is a single tanh unit
+        Input is own and enemy orbs relative to critical mass
+        """
+
+        self.weights = [
+            (np.asarray(w, np.float32), np.asarray(b, np.float32))
+            for w, b in weights
+        ]
+
+        # critical mass of cells for scaling inputs
+        eng = engine.get_engine(shape or engine.SHAPE)
+        self.shape = eng.shape
+        self.cmass = np.array(eng.cmass, np.float32)
+
+    @classmethod
+    def random(cls, hidden=(64,), seed=0, shape=None):
+        """ Untrained model for shape, the selected shape if None """
+        rng = np.random.default_rng(seed)
+        shape = shape or engine.SHAPE
+        sizes = [2 * shape[0] * shape[1]] + list(hidden) + [1]
+
+        weights = []
+        for n_in, n_out in zip(sizes[:-1], sizes[1:]):
+            matrix = rng.normal(0, np.sqrt(2 / n_in), (n_in, n_out))
+            weights.append((matrix, np.zeros(n_out)))
+
+        return cls(weights, shape)
+
+    @classmethod
+    def load(cls, path: str, shape=None):
+        """ Load model of shape from .npz archive """
+        with np.load(path) as data:
+            layers = len(data.files) // 2
+            weights = [
+                (data["w%d" % i], data["b%d" % i]) for i in range(layers)
+            ]
+        return cls(weights, shape)
+
+    def save(self, path: str):
+        """ Save model as .npz archive """
+        arrays = {}
+        for i, (matrix, bias) in enumerate(self.weights):
+            arrays["w%d" % i] = matrix
+            arrays["b%d" % i] = bias
+        np.savez(path, **arrays)
+
+    def features(self, boards, players):
+        """ Batch of input vectors seen by players to move """
+        signs = np.where(np.asarray(players) == 1, -1, 1).astype(np.int8)
+        orbs = np.asarray(boards, np.int8) * signs[:, None]
+
+        own = np.maximum(orbs, 0) / self.cmass
+        enemy = np.maximum(-orbs, 0) / self.cmass
+        return np.concatenate([own, enemy], axis=1).astype(np.float32)
+
+    def evaluate(self, boards, players, eng=None) -> list:
+        """ Values of boards in favor of players to move """
+        if not boards:
+            return []
+
+        # inputs are laid out for one shape
+        if eng is not None and eng.shape != self.shape:
+            raise ValueError(
+                "Model takes %dx%d boards, got %dx%d"
+                % (*self.shape, *eng.shape)
+            )
+
+        activ = self.features(boards, players)
+        for matrix, bias in self.weights[:-1]:
+            activ = np.maximum(activ @ matrix + bias, 0)
+
+        matrix, bias = self.weights[-1]
+        return np.tanh(activ @ matrix + bias)[:, 0].tolist()
@@ -4,35 +4,111 @@ import random
 import os
 
 # engines
+import chain_reaction.wrappers.book as book
+import chain_reaction.wrappers.clock as clock
 import chain_reaction.wrappers.engine as game
 import chain_reaction.wrappers.minimax as minimax
 import chain_reaction.wrappers.mcts as mcts
+import chain_reaction.profiler as profiler
 
-# suppress welcome messages
-with open(os.devnull, "w") as f, contextlib.redirect_stdout(f):
-    import chain_reaction.graphics.window as window
+# graphics (pygame and numpy) are imported by init_window,
+# so headless users of this module never load them
+window = None
 
 
-def construct_agent(oftype: str, player: int, configs: dict):
-    """ Construct agent lambda functions  """
+def init_window(shape: tuple):
+    """ Import and initialize graphics on first use """
+
+    global window
+
+    # suppress welcome messages
+    if window is None:
+        with open(os.devnull, "w") as f, contextlib.redirect_stdout(f):
+            import chain_reaction.graphics.window as graphics
+
+        window = graphics
+
+    window.init(shape)
+
+
+def construct_agent(oftype: str, player: int, configs: dict, eng=None):
+    """
+    Construct agent lambda functions
+    Each agent draws from its own generator, seeded by configs["seed"]
+    An agent config with "game_time" gets a clock for the whole game,
+    one with "move_time" a fixed budget for every move instead
+    Agents play boards of eng, the selected engine if None
+    Pondering agents keep their background search to themselves,
+    stop it with stop_agent once their game is over
+    """
+
+    rng = random.Random(configs.get("seed"))
+    game_clock = None
+    agent_config = configs.get(oftype, {})
+    if agent_config.get("move_time"):
+        game_clock = clock.MoveClock(agent_config["move_time"])
+    elif agent_config.get("game_time"):
+        game_clock = clock.GameClock(
+            agent_config["game_time"], agent_config.get("increment", 0.0)
+        )
 
     if oftype == "human":
         agent_func = None
 
     elif oftype == "random":
-        agent_func = lambda x: random.choice(game.valid_board_moves(x, player))
+        agent_func = lambda x: rng.choice(game.valid_board_moves(x, player))
 
     elif oftype == "mcts":
         mcts_timelim = configs["mcts"]["time_limit"]
         mcts_c_param = configs["mcts"]["c_param"]
+        mcts_ponder = {} if configs["mcts"].get("ponder", False) else None
+        mcts_rollout = configs["mcts"].get("rollout", "random")
+        mcts_cutoff = configs["mcts"].get("cutoff", 0)
+        mcts_select = configs["mcts"].get("selection", "uct")
+        mcts_rave_k = configs["mcts"].get("rave_k", 0)
+        mcts_threads = configs["mcts"].get("threads", 1)
+        mcts_evaluator = configs["mcts"].get("evaluator", None)
+        mcts_batch = configs["mcts"].get("batch_size", 8)
+        mcts_playouts = configs["mcts"].get("playouts", 0)
         agent_func = lambda x: mcts.best_move(
-            x, player, mcts_timelim, mcts_c_param
+            x,
+            player,
+            mcts_timelim,
+            mcts_c_param,
+            mcts_ponder,
+            mcts_rollout,
+            mcts_cutoff,
+            mcts_select,
+            mcts_rave_k,
+            mcts_threads,
+            mcts_evaluator,
+            mcts_batch,
+            rng,
+            mcts_playouts,
+            game_clock,
+            eng,
         )
+        if mcts_ponder is not None:
+            agent_func.stop = lambda: mcts.ponder_stop(mcts_ponder)
 
     elif oftype == "minimax":
         mm_depth = configs["minimax"]["search_depth"]
-        mm_randn = configs["minimax"]["randomness"]
-        agent_func = lambda x: minimax.best_move(x, player, mm_depth, mm_randn)
+        mm_margin = configs["minimax"].get("margin", 0)
+        mm_temp = configs["minimax"].get("temperature", 0.0)
+        mm_ponder = {} if configs["minimax"].get("ponder", False) else None
+        agent_func = lambda x: minimax.best_move(
+            x,
+            player,
+            mm_depth,
+            mm_margin,
+            mm_temp,
+            mm_ponder,
+            rng,
+            game_clock,
+            eng,
+        )
+        if mm_ponder is not None:
+            agent_func.stop = lambda: minimax.ponder_stop(mm_ponder)
 
     else:
         raise ValueError("Invalid player type " + oftype)
@@ -40,6 +116,13 @@ def construct_agent(oftype: str, player: int, configs: dict):
     return agent_func
 
 
+def stop_agent(agent_func):
+    """ Stop searches an agent of construct_agent runs in background """
+
+    if hasattr(agent_func, "stop"):
+        agent_func.stop()
+
+
 def construct_instance(oftype: str):
     """ Construct game and window instances """
 
@@ -83,20 +166,23 @@ def main_graphical_loop(game_inst, win_inst, agent1_func, agent2_func):
     while not game_inst.game_over and win_inst.open:
 
         # players alternate
-        if game_inst.player == 0:
-            move = agent1_func(game_inst.board)
-        else:
-            move = agent2_func(game_inst.board)
+        player = game_inst.player
+        with profiler.span("agent_%d" % player, "agent") as span:
+            if player == 0:
+                move = agent1_func(game_inst.board)
+            else:
+                move = agent2_func(game_inst.board)
 
         # play move
         if move is not None:
+            profiler.agent_move(player, move, span.elapsed)
             win_inst.event_flush()  # agent takes long time
             win_inst.on_game_move(game_inst, move)
             move = None
 
         # handle events and limit fps
         win_inst.event_handler()
-        win_inst.clock.tick(win_inst.fps)
+        win_inst.tick()
 
     # game over
     win_inst.on_game_end(game_inst)
@@ -110,12 +196,23 @@ def start_game(
     player2: str,
     config1: dict,
     config2: dict,
+    book_path: str = None,
+    profile_path: str = None,
+    trace_path: str = None,
 ):
     """ Game Entry Point """
 
+    # opt-in timings of the game loop
+    if profile_path or trace_path:
+        profiler.init(tracing=bool(trace_path))
+
     # initialize for shapes
     game.init(shape)
-    window.init(shape)
+    init_window(shape)
+
+    # opening book for agents
+    if book_path:
+        book.init(book_path)
 
     # minimax init
     if player1 == "minimax" or player2 == "minimax":
@@ -125,7 +222,15 @@ def start_game(
             err_msg = "minimax in c cannot work with shape != (9, 6)"
             raise ValueError(err_msg)
 
-        minimax.init(backend)
+        # optional leaf evaluator, cache and workers from either config
+        evaluator, cache_size, workers = None, 0, 1
+        for config in (config1, config2):
+            config = config.get("minimax", {})
+            evaluator = config.get("evaluator", evaluator)
+            cache_size = config.get("cache_size", cache_size)
+            workers = config.get("workers", workers)
+
+        minimax.init(backend, evaluator, cache_size, None, workers)
         print("Using %s backend for minimax" % backend)
 
     # mcts init
@@ -144,3 +249,17 @@ def start_game(
 
     # start game loop
     main_graphical_loop(game_inst, win_inst, player1_agent, player2_agent)
+
+    # stop searches on opponent's time
+    stop_agent(player1_agent)
+    stop_agent(player2_agent)
+    minimax.cache_close()
+    minimax.pool_close()
+
+    # dump timings
+    if profile_path or trace_path:
+        print(profiler.report())
+    if profile_path:
+        profiler.write_timings(profile_path)
+    if trace_path:
+        profiler.write_trace(trace_path)
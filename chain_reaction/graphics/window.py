@@ -5,6 +5,7 @@ import pygame.font as font
 import pygame.gfxdraw as gfxdraw
 
 import chain_reaction.graphics.sprites as sprites
+import chain_reaction.profiler as profiler
 import chain_reaction.wrappers.engine as engine
 
 
@@ -79,12 +80,20 @@ class BaseGameWindow(ABC):
     def clear(self):
         self.surface.fill(COL_BACK)
 
+    @profiler.timed("display_update", "render")
     def update(self):
         pygame.display.update()
 
+    def tick(self):
+        """ Limit frame rate and mark end of frame """
+        with profiler.span("clock_tick", "idle"):
+            self.clock.tick(self.fps)
+        profiler.frame()
+
     def event_flush(self):
         pygame.event.clear()
 
+    @profiler.timed(category="events")
     def event_handler(self):
         """ Handle events in window """
         # Refresh values
@@ -108,12 +117,14 @@ class BaseGameWindow(ABC):
                 val = (0 <= idx[0] < G_SHAP[1]) * (0 <= idx[1] < G_SHAP[0])
                 self.midx = idx if val else None
 
+    @profiler.timed(category="render")
     def draw_indicator(self, player):
         """ Draw rectangle to indicate next player """
         pcolor = COL_PLR2 if player else COL_PLR1
         nxrect = (G_HOFF, R_VOFF, G_DIMS[0], R_THIC)
         pygame.draw.rect(self.surface, pcolor, nxrect)
 
+    @profiler.timed(category="render")
     def draw_grid(self):
         """ Draw grid on screen """
         gwid, ghgt = G_DIMS
@@ -128,6 +139,7 @@ class BaseGameWindow(ABC):
             grect = (G_HOFF + i * G_WIDC, G_VOFF, G_WALL, ghgt)
             pygame.draw.rect(self.surface, COL_FORE, grect)
 
+    @profiler.timed(category="render")
     def draw_orbs(self, board, ignore=[]):
         """ Draw orb sprites on the surface """
         gcol, grow = G_SHAP
@@ -146,6 +158,7 @@ class BaseGameWindow(ABC):
                 psprite = ORB_PL1 if ccount > 0 else ORB_PL2
                 self.surface.blit(psprite[abs(ccount) - 1], pos)
 
+    @profiler.timed(category="render")
     def draw_all(self, board, player):
         """ Draw all drawable elements """
         self.clear()
@@ -191,7 +204,8 @@ class StaticGameWindow(BaseGameWindow):
             return
 
         # play
-        game.make_move(move)
+        with profiler.span("make_move", "engine"):
+            game.make_move(move)
         self.draw_all(game.board, game.player)
 
     def on_game_end(self, game):
@@ -221,6 +235,7 @@ class AnimatedGameWindow(BaseGameWindow):
 
         self.flight_steps = flight_steps
 
+    @profiler.timed(category="render")
     def draw_flights(self, flights, progress, player):
         # setup
         gcol, grow = G_SHAP
@@ -244,6 +259,7 @@ class AnimatedGameWindow(BaseGameWindow):
             gfxdraw.aacircle(self.surface, pos_x, pos_y, 10, pcolor)
             gfxdraw.filled_circle(self.surface, pos_x, pos_y, 10, pcolor)
 
+    @profiler.timed(category="render")
     def explode_orbs(self, board, explosions, player, callback=None):
         """
         Show orb explosion animation
@@ -272,7 +288,7 @@ class AnimatedGameWindow(BaseGameWindow):
             callback() if callback else None  # optional callback
             self.update()
             self.event_handler()
-            self.clock.tick(self.fps)
+            self.tick()
 
     def on_game_start(self):
         """ Splash Screen """
@@ -287,7 +303,9 @@ class AnimatedGameWindow(BaseGameWindow):
             return
 
         # invalid move
-        if not game.make_move(move):
+        with profiler.span("make_move", "engine"):
+            valid = game.make_move(move)
+        if not valid:
             return
 
         # lock to not respond to mouse clicks
@@ -298,7 +316,8 @@ class AnimatedGameWindow(BaseGameWindow):
         while game.pending_moves and not game.game_over and self.open:
 
             # get board and explosions for animation
-            prev_board, explosions = game.get_next_step()
+            with profiler.span("interact_onestep", "engine"):
+                prev_board, explosions = game.get_next_step()
 
             # draw explosions
             self.explode_orbs(prev_board, explosions, player)
@@ -357,7 +376,7 @@ class AnimatedGameWindow(BaseGameWindow):
             self.update()
             while self.open:
                 self.event_handler()
-                self.clock.tick(self.fps)
+                self.tick()
 
         # voluntary close
         if not game.game_over and not self.open:
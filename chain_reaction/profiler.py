@@ -0,0 +1,207 @@
+# Profiling hooks for the game loop
+# Spans time agent calls, engine interactions, rendering and event handling
+# Disabled by default, where every hook costs a flag check
+#
+# Enabled   : totals per span name, frame times and agent move times
+# Trace     : additionally keeps every span as a Chrome trace event,
+#             load the json in chrome://tracing or ui.perfetto.dev
+
+
+import functools
+import json
+import os
+import threading
+import time
+
+
+# ---------- ON INIT ---------------
+ENABLED = False
+TRACING = False
+ORIGIN = 0
+TOTALS = {}
+FRAMES = []
+MOVES = []
+EVENTS = []
+LAST_FRAME = None
+
+
+# ----------- INIT -----------------
+def init(enabled=True, tracing=False):
+    """ Enable (or disable) profiling and reset all timings """
+    global ENABLED, TRACING, ORIGIN, TOTALS
+    global FRAMES, MOVES, EVENTS, LAST_FRAME
+
+    ENABLED = enabled or tracing
+    TRACING = tracing
+    ORIGIN = time.perf_counter_ns()
+    TOTALS, FRAMES, MOVES, EVENTS = {}, [], [], []
+    LAST_FRAME = None
+
+
+# ----------- CLASSES --------------
+class Span:
+    def __init__(self, name: str, category: str):
+        """ Timed region, use as context manager """
+        self.name = name
+        self.category = category
+        self.start = 0
+        self.elapsed = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter_ns() - self.start
+        record(self.name, self.category, self.start, self.elapsed)
+        return False
+
+
+class NullSpan:
+    """ Stand-in span while profiling is disabled """
+
+    elapsed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+# ------------- HOOKS ----------------
+def span(name: str, category="game"):
+    """ Context manager timing the enclosed block """
+    return Span(name, category) if ENABLED else NULL_SPAN
+
+
+def timed(name=None, category="game"):
+    """ Decorator timing every call of a function """
+
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with Span(label, category):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def record(name: str, category: str, start: int, elapsed: int):
+    """ Add a finished span, times in nanoseconds """
+
+    # running totals (count, total, max)
+    total = TOTALS.get(name)
+    if total is None:
+        TOTALS[name] = [1, elapsed, elapsed]
+    else:
+        total[0] += 1
+        total[1] += elapsed
+        total[2] = max(total[2], elapsed)
+
+    # complete event, microseconds from init
+    if TRACING:
+        EVENTS.append(
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start - ORIGIN) / 1000,
+                "dur": elapsed / 1000,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+            }
+        )
+
+
+def frame():
+    """ Mark end of a frame, records time since previous mark """
+    global LAST_FRAME
+
+    if not ENABLED:
+        return
+
+    now = time.perf_counter_ns()
+    if LAST_FRAME is not None:
+        FRAMES.append((now - LAST_FRAME) / 1e6)
+    LAST_FRAME = now
+
+
+def agent_move(player: int, move: int, elapsed: int):
+    """ Record time in nanoseconds an agent took for move """
+    if ENABLED:
+        entry = {"player": player, "move": move, "ms": elapsed / 1e6}
+        MOVES.append(entry)
+
+
+# ------------ EXPORTS ---------------
+def percentile(values: list, fraction: float) -> float:
+    """ Nearest rank percentile of values """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summary() -> dict:
+    """ Span totals, frame time statistics and move times """
+
+    spans = {
+        name: {
+            "calls": count,
+            "total_ms": total / 1e6,
+            "mean_ms": total / count / 1e6,
+            "max_ms": most / 1e6,
+        }
+        for name, (count, total, most) in TOTALS.items()
+    }
+
+    frames = {
+        "count": len(FRAMES),
+        "mean_ms": sum(FRAMES) / len(FRAMES) if FRAMES else 0.0,
+        "p95_ms": percentile(FRAMES, 0.95),
+        "max_ms": max(FRAMES, default=0.0),
+    }
+
+    return {"spans": spans, "frames": frames, "moves": MOVES}
+
+
+def report() -> str:
+    """ Span totals as a text table, slowest first """
+
+    stats = summary()
+    spans, frames = stats["spans"], stats["frames"]
+    row = "%-24s %8s %10s %10s %10s"
+    lines = [row % ("span", "calls", "total ms", "mean ms", "max ms")]
+
+    for name in sorted(spans, key=lambda x: -spans[x]["total_ms"]):
+        stat = spans[name]
+        values = (stat["total_ms"], stat["mean_ms"], stat["max_ms"])
+        values = ["%.2f" % x for x in values]
+        lines.append(row % (name, stat["calls"], *values))
+
+    keys = ("count", "mean_ms", "p95_ms", "max_ms")
+    values = tuple([frames[x] for x in keys])
+    lines.append("frames %d, mean %.2f, p95 %.2f, max %.2f ms" % values)
+    return "\n".join(lines)
+
+
+def write_timings(path: str):
+    """ Dump summary with every frame time as json """
+    with open(path, "w") as f:
+        json.dump({**summary(), "frame_ms": FRAMES}, f, indent=1)
+
+
+def write_trace(path: str):
+    """ Dump spans in Chrome trace event format """
+    with open(path, "w") as f:
+        json.dump({"traceEvents": EVENTS, "displayTimeUnit": "ms"}, f)
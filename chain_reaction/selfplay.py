@@ -0,0 +1,252 @@
+# Headless self-play data generation
+# Every move of an MCTS self-play game is stored as a fixed size record
+#   board (int8 x size), player (uint8), move (uint8),
+#   root visit counts (uint16 x size), result for player (int8)
+# Records are written in zlib compressed chunk files, one shard per worker,
+# and unpacked once into a flat file that training memory-maps
+
+
+import glob
+import multiprocessing
+import os
+import random
+import struct
+import zlib
+
+import chain_reaction.backends.python.mcts_agent as mcts_agent
+import chain_reaction.wrappers.engine as engine
+import chain_reaction.wrappers.symmetry as symmetry
+
+
+# ---------- FILE FORMAT -----------
+CHUNK_MAGIC = b"CRS1"
+FLAT_MAGIC = b"CRF1"
+HEADER = struct.Struct("<4sBBII")  # magic, rows, cols, records, bytes
+
+
+# ------------ UTILITIES -------------
+def record_struct(size: int) -> struct.Struct:
+    """ Binary layout of one record for boards of size cells """
+    return struct.Struct("<%dbBB%dHb" % (size, size))
+
+
+def record_dtype(size: int):
+    """ NumPy dtype matching record_struct """
+    import numpy as np
+
+    return np.dtype(
+        [
+            ("board", "i1", (size,)),
+            ("player", "u1"),
+            ("move", "u1"),
+            ("visits", "<u2", (size,)),
+            ("result", "i1"),
+        ]
+    )
+
+
+def play_game(playouts, c_param, rollout, cutoff, explore_plies, rng) -> list:
+    """
+    Play one MCTS self-play game, drawing random choices from rng
+    Moves are sampled by visit count for the first explore_plies,
+    then the most visited move is played
+    Returns list of (board, player, move, visits, result)
+    """
+
+    # setup
+    game = engine.ChainReactionGame()
+    policy = mcts_agent.ROLLOUT_POLICIES[rollout]
+    size = len(game.board)
+    history = []
+
+    while not game.game_over:
+        # fixed number of playouts per move
+        rootnode = mcts_agent.new_root(game.board, game.player)
+        for _ in range(playouts):
+            rootnode.playout(c_param, policy, cutoff, rng=rng)
+
+        # visit distribution over all cells
+        visits = [0] * size
+        for move, count in zip(rootnode.child_moves, rootnode.child_visits):
+            visits[move] = min(count, 0xFFFF)
+
+        # root holds one move per symmetry class, twins get its visits
+        reps = symmetry.move_representatives(game.board)
+        if reps:
+            visits = [visits[reps[idx]] for idx in range(size)]
+
+        # exploratory moves in the opening
+        if len(history) < explore_plies:
+            move = rng.choices(rootnode.child_moves, rootnode.child_visits)
+            move = move[0]
+        else:
+            move = max(range(size), key=lambda x: visits[x])
+
+        history.append((game.board[:], game.player, move, visits))
+        game.make_move(move)
+
+    # label every position with the final result
+    return [
+        (board, player, move, visits, 1 if player == game.winner else -1)
+        for board, player, move, visits in history
+    ]
+
+
+# ------------- WRITING --------------
+def write_chunk(path: str, records: list):
+    """ Write records as one compressed chunk file """
+    size = engine.SHAPE[0] * engine.SHAPE[1]
+    layout = record_struct(size)
+
+    payload = b"".join(
+        [
+            layout.pack(*board, player, move, *visits, result)
+            for board, player, move, visits, result in records
+        ]
+    )
+    payload = zlib.compress(payload, 6)
+
+    with open(path, "wb") as f:
+        header = (CHUNK_MAGIC, *engine.SHAPE, len(records), len(payload))
+        f.write(HEADER.pack(*header))
+        f.write(payload)
+
+
+def generate_shard(args) -> int:
+    """
+    Worker process entry point
+    Plays games and flushes chunks of records to directory
+    Returns number of records written
+    """
+
+    directory, shape, worker, games, seed, chunk_size, settings = args
+    engine.init(shape)
+    rng = random.Random(seed)
+
+    chunk, chunk_id, written = [], 0, 0
+    for game_id in range(games):
+        chunk += play_game(rng=rng, **settings)
+
+        # flush full chunks and the last one
+        if len(chunk) >= chunk_size or game_id == games - 1:
+            name = "shard-%03d-%05d.crs" % (worker, chunk_id)
+            write_chunk(os.path.join(directory, name), chunk)
+            written += len(chunk)
+            chunk, chunk_id = [], chunk_id + 1
+
+    return written
+
+
+def generate(
+    directory: str,
+    games: int,
+    workers: int,
+    seed=0,
+    chunk_size=4096,
+    playouts=200,
+    c_param=1.4,
+    rollout="random",
+    cutoff=0,
+    explore_plies=8,
+) -> int:
+    """
+    Generate self-play records with a pool of worker processes
+    Each worker writes its own shard of chunk files
+    Chunk files of earlier runs in directory are removed first
+    Returns number of records written
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    for chunk in glob.glob(os.path.join(directory, "*.crs")):
+        os.remove(chunk)
+
+    settings = {
+        "playouts": playouts,
+        "c_param": c_param,
+        "rollout": rollout,
+        "cutoff": cutoff,
+        "explore_plies": explore_plies,
+    }
+
+    # split games evenly, worker seeds are drawn from seed
+    master = random.Random(seed)
+    jobs = [
+        (
+            directory,
+            engine.SHAPE,
+            worker,
+            games // workers + (worker < games % workers),
+            master.getrandbits(64),
+            chunk_size,
+            settings,
+        )
+        for worker in range(workers)
+    ]
+    jobs = [job for job in jobs if job[3] > 0]
+
+    with multiprocessing.Pool(workers) as pool:
+        return sum(pool.map(generate_shard, jobs))
+
+
+# ------------- READING --------------
+def read_chunk(path: str) -> tuple:
+    """ Returns (shape, decompressed record bytes) of chunk file """
+    with open(path, "rb") as f:
+        magic, s_h, s_w, count, length = HEADER.unpack(f.read(HEADER.size))
+        if magic != CHUNK_MAGIC:
+            raise ValueError("Not a self-play chunk file " + path)
+        payload = zlib.decompress(f.read(length))
+
+    return ((s_h, s_w), payload)
+
+
+def unpack(directory: str, path: str) -> int:
+    """
+    Concatenate all chunks of directory into one flat file
+    Returns number of records in flat file
+    """
+
+    chunks = sorted(glob.glob(os.path.join(directory, "*.crs")))
+    shape, count = None, 0
+
+    # invalid condition
+    if not chunks:
+        raise ValueError("No self-play chunk files in " + directory)
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(FLAT_MAGIC, 0, 0, 0, 0))  # patched below
+
+        for chunk in chunks:
+            c_shape, payload = read_chunk(chunk)
+
+            # invalid condition
+            if shape and c_shape != shape:
+                raise ValueError("Chunks of different board shapes")
+
+            shape = c_shape
+            count += len(payload) // record_struct(shape[0] * shape[1]).size
+            f.write(payload)
+
+        # patch header with totals
+        f.seek(0)
+        f.write(HEADER.pack(FLAT_MAGIC, *shape, count, 0))
+
+    return count
+
+
+def load_records(path: str):
+    """ Memory-mapped structured array of records in flat file """
+    import numpy as np
+
+    with open(path, "rb") as f:
+        magic, s_h, s_w, count, _ = HEADER.unpack(f.read(HEADER.size))
+        if magic != FLAT_MAGIC:
+            raise ValueError("Not a flat self-play file " + path)
+
+    return np.memmap(
+        path,
+        dtype=record_dtype(s_h * s_w),
+        mode="r",
+        offset=HEADER.size,
+        shape=(count,),
+    )
@@ -0,0 +1,391 @@
+# Asyncio Game Server
+# Hosts many concurrent games over a local TCP or Unix socket
+# Protocol is one JSON object per line in both directions
+#
+# Requests
+#   {"op": "new", "players": ["human", "minimax"], "configs": [{}, {...}],
+#    "shape": [9, 6], "seed": 7}
+#   {"op": "move", "game": id, "move": index}
+#   {"op": "state", "game": id}
+#   {"op": "close", "game": id}
+# Responses
+#   {"ok": true, "game": id, "board": [...], "player": 0,
+#    "game_over": false, "winner": 2, "moves": [...]}
+#   {"ok": false, "error": "message"}
+#
+# Agent configs missing a required setting get the one of AGENT_DEFAULTS
+#
+# Agent moves run in a process pool and are played right after the
+# preceding move, so "new" and "move" reply once a human is to move
+# Searching agents get the game's budget as a fixed time per move,
+# which a client may lower but not raise above the server's budget
+# Agents that are late or fail play a random move instead
+# Every agent move gets a seed drawn from the game's generator, so
+# seeded games replay identically whichever worker plays the move
+
+
+import asyncio
+import concurrent.futures
+import itertools
+import json
+import random
+
+import chain_reaction.game as chain_reaction_game
+import chain_reaction.wrappers.engine as engine
+import chain_reaction.wrappers.minimax as minimax
+
+
+# ---------- CONSTANTS -------------
+AGENTS = ("human", "random", "minimax", "mcts")
+AGENT_DEFAULTS = {
+    "minimax": {"search_depth": 4},
+    "mcts": {"time_limit": 1.0, "c_param": 1.5},
+}
+BUDGET_MARGIN = 1.0
+
+
+# ------------ UTILITIES -------------
+def is_number(value) -> bool:
+    """ Whether a decoded JSON value is a number (bools are not) """
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def is_index(value, size: int) -> bool:
+    """ Whether a decoded JSON value is a cell index of size cells """
+    return type(value) is int and 0 <= value < size
+
+
+def agent_configs(oftype: str, configs) -> dict:
+    """
+    Configs of agent oftype with missing settings filled in
+    Raises ValueError if configs cannot be played with
+    """
+
+    # invalid condition
+    if type(configs) is not dict:
+        raise ValueError("Invalid configs")
+    if type(configs.get(oftype, {})) is not dict:
+        raise ValueError("Invalid configs of " + oftype)
+
+    # agents without settings
+    if oftype not in AGENT_DEFAULTS:
+        return configs
+
+    config = {**AGENT_DEFAULTS[oftype], **configs.get(oftype, {})}
+    if oftype == "minimax" and not is_index(config["search_depth"], 64):
+        raise ValueError("Invalid search_depth")
+    if oftype == "mcts" and not is_number(config["time_limit"]):
+        raise ValueError("Invalid time_limit")
+    if oftype == "mcts" and not is_number(config["c_param"]):
+        raise ValueError("Invalid c_param")
+
+    return {**configs, oftype: config}
+
+
+# ---------- POOL WORKERS ----------
+def worker_init(backend: str):
+    """ Initialize modules of pool worker processes """
+    minimax.init(backend)
+
+
+def agent_move(shape, oftype: str, player: int, configs: dict, board: list):
+    """ Move of agent oftype on the engine of shape, runs in pool workers """
+    eng = engine.get_engine(shape)
+    agent = chain_reaction_game.construct_agent(oftype, player, configs, eng)
+    return agent(board)
+
+
+# ----------- CLASSES --------------
+class GameSession:
+    def __init__(
+        self, shape, players: list, configs: list, budget: float, seed=None
+    ):
+        """
+        One Hosted Game
+        ---------------
+        - shape   - board shape of game
+        - players - agent type of each player
+        - configs - agent configs of each player
+        - budget  - seconds an agent may take for a move
+        - seed    - seed of agent moves, random if None
+        """
+
+        self.game = engine.ChainReactionGame(engine.get_engine(shape))
+        self.players = players
+        self.configs = configs
+        self.budget = budget
+        self.rng = random.Random(seed)
+
+        # moves of a game are applied one request at a time
+        self.lock = asyncio.Lock()
+
+    def state(self) -> dict:
+        """ Public view of game """
+        return {
+            "board": self.game.board,
+            "player": self.game.player,
+            "game_over": self.game.game_over,
+            "winner": self.game.winner,
+            "moves": self.game.history,
+        }
+
+
+class GameServer:
+    def __init__(self, shape=(9, 6), backend="python", workers=2, budget=5.0):
+        """
+        Chain Reaction Game Service
+        ---------------------------
+        - shape   - default board shape of games
+        - backend - minimax backend of agents ("c" or "python")
+        - workers - processes computing agent moves
+        - budget  - default and largest seconds per agent move
+        Searches are limited to the budget, should an agent still be
+        late a random move is played in its place
+        """
+
+        self.shape = tuple(shape)
+        self.backend = backend
+        self.budget = budget
+        self.sessions = {}
+        self.ids = itertools.count()
+        self.server = None
+
+        self.pool = concurrent.futures.ProcessPoolExecutor(
+            workers, initializer=worker_init, initargs=(backend,)
+        )
+
+    # ------------ NETWORK --------------
+    async def start(self, host="127.0.0.1", port=0, path=None):
+        """ Listen on Unix socket path if given, else on TCP host:port """
+
+        if path:
+            self.server = await asyncio.start_unix_server(self.on_client, path)
+        else:
+            self.server = await asyncio.start_server(
+                self.on_client, host, port
+            )
+        return self.server
+
+    async def serve_forever(self, host="127.0.0.1", port=0, path=None):
+        server = await self.start(host, port, path)
+        async with server:
+            await server.serve_forever()
+
+    async def on_client(self, reader, writer):
+        """ Answer request lines of one connection """
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    response = {"ok": False, "error": "Invalid JSON"}
+                else:
+                    response = await self.handle(message)
+
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+
+        except ConnectionError:
+            pass
+
+        finally:
+            writer.close()
+
+    def close(self):
+        """ Stop listening and shut worker processes down """
+        if self.server:
+            self.server.close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    # ------------ REQUESTS -------------
+    async def handle(self, message) -> dict:
+        """ Response to one request message, any decoded JSON value """
+
+        handlers = {
+            "new": self.on_new,
+            "move": self.on_move,
+            "state": self.on_state,
+            "close": self.on_close,
+        }
+
+        # invalid condition
+        if type(message) is not dict or type(message.get("op")) is not str:
+            return {"ok": False, "error": "Invalid request"}
+        if message["op"] not in handlers:
+            return {"ok": False, "error": "Invalid request"}
+
+        try:
+            return await handlers[message["op"]](message)
+        except ValueError as err:
+            return {"ok": False, "error": str(err)}
+
+    async def on_new(self, message: dict) -> dict:
+        players = message.get("players", ["human", "minimax"])
+        configs = message.get("configs", [{}, {}])
+        budget = message.get("budget", self.budget)
+        shape = message.get("shape", self.shape)
+        seed = message.get("seed")
+
+        # invalid condition
+        if type(players) is not list or len(players) != 2:
+            raise ValueError("Invalid players")
+        if any([type(p) is not str or p not in AGENTS for p in players]):
+            raise ValueError("Invalid players")
+        if type(configs) is not list or len(configs) != 2:
+            raise ValueError("Invalid configs")
+        if type(shape) not in (list, tuple) or len(shape) != 2:
+            raise ValueError("Invalid shape")
+        if any([type(x) is not int or not 2 <= x <= 16 for x in shape]):
+            raise ValueError("Invalid shape")
+        shape = tuple(shape)
+        if self.backend == "c" and "minimax" in players and shape != (9, 6):
+            raise ValueError("minimax in c cannot work with shape != (9, 6)")
+        if not is_number(budget) or not budget > 0:
+            raise ValueError("Invalid budget")
+        if seed is not None and type(seed) is not int:
+            raise ValueError("Invalid seed")
+
+        # complete agent settings before the game exists
+        configs = [agent_configs(p, c) for p, c in zip(players, configs)]
+
+        # clients may ask for less time, never for more
+        budget = min(budget, self.budget)
+
+        session_id = next(self.ids)
+        session = GameSession(shape, players, configs, budget, seed)
+        self.sessions[session_id] = session
+
+        async with session.lock:
+            await self.play_agents(session)
+            return {"ok": True, "game": session_id, **session.state()}
+
+    async def on_move(self, message: dict) -> dict:
+        session_id, session = self.session_of(message)
+
+        async with session.lock:
+            game = session.game
+
+            # invalid condition
+            move = message.get("move")
+            if session.players[game.player] != "human":
+                raise ValueError("Not a human player's turn")
+            if not is_index(move, len(game.board)):
+                raise ValueError("Invalid move")
+            if not game.make_move(move):
+                raise ValueError("Invalid move")
+
+            await self.play_agents(session)
+            return {"ok": True, "game": session_id, **session.state()}
+
+    async def on_state(self, message: dict) -> dict:
+        session_id, session = self.session_of(message)
+        return {"ok": True, "game": session_id, **session.state()}
+
+    async def on_close(self, message: dict) -> dict:
+        session_id, _ = self.session_of(message)
+        self.sessions.pop(session_id)
+        return {"ok": True}
+
+    def session_of(self, message: dict) -> tuple:
+        """ Returns (id, session) of game in message """
+        session_id = message.get("game")
+        if type(session_id) is not int or session_id not in self.sessions:
+            raise ValueError("Unknown game")
+        return (session_id, self.sessions[session_id])
+
+    # ------------- AGENTS --------------
+    async def play_agents(self, session: GameSession):
+        """ Play agent moves until a human is to move or game is over """
+
+        loop = asyncio.get_running_loop()
+        game = session.game
+
+        while not game.game_over:
+            player = game.player
+            oftype = session.players[player]
+            if oftype == "human":
+                return
+
+            # searches get the budget as move time and do not ponder,
+            # as every move is played by a fresh agent
+            configs = {**session.configs[player]}
+            configs["seed"] = session.rng.getrandbits(64)
+            if oftype in configs:
+                configs[oftype] = {
+                    **configs[oftype],
+                    "move_time": session.budget,
+                    "ponder": False,
+                }
+
+            # agent move in pool within time budget
+            task = loop.run_in_executor(
+                self.pool,
+                agent_move,
+                game.shape,
+                oftype,
+                player,
+                configs,
+                game.board[:],
+            )
+            try:
+                move = await asyncio.wait_for(
+                    task, session.budget + BUDGET_MARGIN
+                )
+            except Exception:
+                move = None
+
+            # late or failed agents play a random move instead
+            size = len(game.board)
+            if not is_index(move, size) or not game.make_move(move):
+                move = session.rng.choice(
+                    engine.valid_board_moves(game.board, player)
+                )
+                game.make_move(move)
+
+
+class LocalClient:
+    def __init__(self, server: GameServer):
+        """
+        In-process Client Stand-in
+        Sends requests straight to server, bypassing sockets
+        """
+        self.server = server
+
+    async def request(self, **message) -> dict:
+        # round trip through JSON like a socket client
+        message = json.loads(json.dumps(message))
+        response = await self.server.handle(message)
+        return json.loads(json.dumps(response))
+
+    async def close(self):
+        pass
+
+
+class SocketClient:
+    def __init__(self, reader, writer):
+        """ JSON lines client, create with connect """
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=0, path=None):
+        """ Connect to Unix socket path if given, else to TCP host:port """
+        if path:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, **message) -> dict:
+        self.writer.write(json.dumps(message).encode() + b"\n")
+        await self.writer.drain()
+        return json.loads(await self.reader.readline())
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
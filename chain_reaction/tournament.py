@@ -0,0 +1,219 @@
+# Headless matches between two agents
+# Games are played in pairs with colors swapped, so that the first move
+# advantage cancels out, and pairs are spread over a process pool
+#
+# A sequential probability ratio test (SPRT) on pair scores stops the
+# match once elo is shown to be below elo0 or above elo1, using the
+# normal approximation of the generalized SPRT
+# Elo is reported with a 95% confidence interval from the same scores
+
+
+import math
+import multiprocessing
+import random
+import time
+
+import chain_reaction.game as chain_reaction_game
+import chain_reaction.wrappers.engine as engine
+import chain_reaction.wrappers.minimax as minimax
+
+
+# ---------- CONSTANTS -------------
+MAX_PLIES = 2000
+CONFIDENCE_Z = 1.96
+VARIANCE_FLOOR = 0.01
+
+
+# ------------ UTILITIES -------------
+def elo_to_score(elo: float) -> float:
+    """ Expected score of a player elo points stronger """
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def score_to_elo(score: float) -> float:
+    """ Elo difference giving expected score, infinite at 0 and 1 """
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+
+def mean_variance(values: list) -> tuple:
+    """ Returns (mean, population variance) of values """
+    mean = sum(values) / len(values)
+    return (mean, sum([(x - mean) ** 2 for x in values]) / len(values))
+
+
+def elo_interval(pair_scores: list) -> tuple:
+    """ Returns (elo, lower, upper) of 95% interval from pair scores """
+    mean, var = mean_variance(pair_scores)
+    var = max(var, VARIANCE_FLOOR)
+    margin = CONFIDENCE_Z * math.sqrt(var / len(pair_scores))
+    return (
+        score_to_elo(mean),
+        score_to_elo(mean - margin),
+        score_to_elo(mean + margin),
+    )
+
+
+# ----------- CLASSES --------------
+class SPRT:
+    def __init__(self, elo0=0.0, elo1=10.0, alpha=0.05, beta=0.05):
+        """
+        Sequential Probability Ratio Test
+        ---------------------------------
+        - elo0  - elo of null hypothesis (not stronger)
+        - elo1  - elo of alternative hypothesis (stronger)
+        - alpha - false positive rate
+        - beta  - false negative rate
+        """
+
+        self.score0 = elo_to_score(elo0)
+        self.score1 = elo_to_score(elo1)
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+
+    def llr(self, pair_scores: list) -> float:
+        """ Log likelihood ratio of pair scores """
+
+        # one sided runs of results have no spread
+        if len(pair_scores) < 2:
+            return 0.0
+        mean, var = mean_variance(pair_scores)
+        var = max(var, VARIANCE_FLOOR)
+
+        # normal approximation of generalized llr
+        s_0, s_1 = self.score0, self.score1
+        count = len(pair_scores)
+        return count * (s_1 - s_0) * (2 * mean - s_0 - s_1) / (2 * var)
+
+    def status(self, pair_scores: list):
+        """ "H1" once elo1 is accepted, "H0" once elo0 is, else None """
+        llr = self.llr(pair_scores)
+        if llr >= self.upper:
+            return "H1"
+        if llr <= self.lower:
+            return "H0"
+        return None
+
+
+# ---------- POOL WORKERS ----------
+def worker_init(shape, backend: str, players: list):
+    """ Initialize modules of pool worker processes """
+    engine.init(shape)
+    if "minimax" in players:
+        minimax.init(backend)
+
+
+def play_game(agents: list) -> int:
+    """ Play agents against each other, returns winner (2 if no result) """
+    game = engine.ChainReactionGame()
+
+    while not game.game_over and len(game.history) < MAX_PLIES:
+        game.make_move(agents[game.player](game.board))
+
+    # stop searches on opponent's time
+    for agent in agents:
+        chain_reaction_game.stop_agent(agent)
+
+    return game.winner if game.game_over else 2
+
+
+def play_pair(args) -> tuple:
+    """
+    Play two games with colors swapped
+    Returns (wins, losses, draws) of first agent
+    """
+
+    players, configs, seed = args
+    rng = random.Random(seed)
+    results = [0, 0, 0]
+
+    for first in (0, 1):
+        # agent of index first moves first
+        order = (first, 1 - first)
+        agents = [
+            chain_reaction_game.construct_agent(
+                players[idx],
+                player,
+                {**configs[idx], "seed": rng.getrandbits(64)},
+            )
+            for player, idx in enumerate(order)
+        ]
+
+        winner = play_game(agents)
+        results[2 if winner == 2 else order[winner]] += 1
+
+    return tuple(results)
+
+
+# ------------- MATCHES --------------
+def match(
+    players: list,
+    configs: list,
+    pairs: int,
+    workers: int,
+    shape=(9, 6),
+    backend="python",
+    seed=0,
+    sprt=None,
+    callback=None,
+) -> dict:
+    """
+    Play up to pairs game pairs of players[0] against players[1]
+    Stops early once sprt (an SPRT instance) accepts a hypothesis
+    callback is called with the summary after every pair
+    Returns summary of the match from the first player's view
+    """
+
+    if pairs < 1:
+        raise ValueError("match needs at least one pair, got %d" % pairs)
+
+    # pair seeds are drawn from seed
+    master = random.Random(seed)
+    jobs = [
+        (players, configs, master.getrandbits(64)) for _ in range(pairs)
+    ]
+
+    time_start = time.perf_counter()
+    results, pair_scores = [0, 0, 0], []
+    stats = None
+
+    with multiprocessing.Pool(
+        workers, initializer=worker_init, initargs=(shape, backend, players)
+    ) as pool:
+        for pair in pool.imap_unordered(play_pair, jobs):
+            results = [x + y for x, y in zip(results, pair)]
+            pair_scores.append((pair[0] + pair[2] / 2) / 2)
+            stats = summary(results, pair_scores, time_start, sprt)
+
+            if callback:
+                callback(stats)
+            if stats["result"]:
+                pool.terminate()
+                break
+
+    return stats
+
+
+def summary(results, pair_scores, time_start: float, sprt=None) -> dict:
+    """ Results, elo interval, test status and throughput of a match """
+
+    games = 2 * len(pair_scores)
+    elo, lower, upper = elo_interval(pair_scores)
+    time_taken = time.perf_counter() - time_start
+
+    return {
+        "games": games,
+        "wins": results[0],
+        "losses": results[1],
+        "draws": results[2],
+        "score": sum(pair_scores) / len(pair_scores),
+        "elo": elo,
+        "elo_lower": lower,
+        "elo_upper": upper,
+        "llr": sprt.llr(pair_scores) if sprt else 0.0,
+        "result": sprt.status(pair_scores) if sprt else None,
+        "games_per_second": games / time_taken if time_taken else 0.0,
+    }
@@ -0,0 +1,132 @@
+# Opening book lookups
+# Book files are built offline (see opening-book.py) and contain
+# sorted 64 bit position hashes followed by one move byte per hash
+# Positions and moves are stored in canonical symmetric form
+
+
+import array
+import bisect
+import hashlib
+import struct
+
+import chain_reaction.wrappers.engine as engine
+import chain_reaction.wrappers.symmetry as symmetry
+
+
+# ---------- FILE FORMAT -----------
+MAGIC = b"CRB2"
+HEADER = struct.Struct("<4sBBI")  # magic, rows, cols, entries
+
+
+# ---------- ON INIT ---------------
+SHAPE = None
+KEYS = None
+MOVES = None
+
+
+# ----------- INIT -----------------
+def init(path: str):
+    """ Load opening book file into memory """
+    global SHAPE, KEYS, MOVES
+
+    with open(path, "rb") as f:
+        data = f.read()
+
+    # validate header
+    magic, s_h, s_w, count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not an opening book file " + path)
+    if (s_h, s_w) != tuple(engine.SHAPE):
+        raise ValueError("Opening book shape does not match board shape")
+
+    # hash index followed by moves
+    SHAPE = (s_h, s_w)
+    offset = HEADER.size
+    KEYS = array.array("Q")
+    KEYS.frombytes(data[offset : offset + 8 * count])
+    MOVES = data[offset + 8 * count : offset + 9 * count]
+
+
+# ------------ UTILITIES -------------
+def position_key(board: list, player: int, shape=None) -> tuple:
+    """
+    Hash of canonical board as seen by the player to move
+    Returns (hash, symmetry mapping board to canonical board)
+    """
+
+    psign = -1 if player else 1
+    c_board, sym = symmetry.canonical(board, shape)
+    packed = bytes([(x * psign) & 0xFF for x in c_board])
+    digest = hashlib.blake2b(packed, digest_size=8).digest()
+    return (int.from_bytes(digest, "little"), sym)
+
+
+def lookup(board: list, player: int, shape=None):
+    """ Book move for board of shape or None if out of book """
+
+    # book not loaded, or of another shape
+    shape = tuple(shape or engine.SHAPE)
+    if KEYS is None or shape != SHAPE:
+        return None
+
+    # binary search over sorted hashes
+    key, sym = position_key(board, player, shape)
+    pos = bisect.bisect_left(KEYS, key)
+    if pos == len(KEYS) or KEYS[pos] != key:
+        return None
+
+    # guard against hash collisions
+    move = symmetry.restore_move(MOVES[pos], sym, shape)
+    psign = -1 if player else 1
+    return move if board[move] * psign >= 0 else None
+
+
+# ------------- BUILDING -------------
+def build(path: str, load_scores, plies: int, depth: int, width: int) -> int:
+    """
+    Build opening book by deep search from the empty board
+    ------------------------------------------------------
+    - path        - output file
+    - load_scores - minimax score function of any backend
+    - plies       - number of plies covered by the book
+    - depth       - search depth for every book position
+    - width       - replies followed from every position
+    Returns number of book entries
+    """
+
+    entries = {}
+    frontier = [[0] * engine.SHAPE[0] * engine.SHAPE[1]]
+
+    for ply in range(plies):
+        player = ply % 2
+        next_frontier = []
+
+        for board in frontier:
+            # transpositions and mirrored boards are searched once
+            key, sym = position_key(board, player)
+            if key in entries:
+                continue
+
+            # book move is the best scoring move
+            score_list = load_scores(board, player, depth)
+            ranked = sorted(range(len(board)), key=lambda x: -score_list[x])
+            entries[key] = symmetry.transform_move(ranked[0], sym)
+
+            # follow the most likely valid replies
+            for move in ranked[:width]:
+                if score_list[move] < -10000:
+                    break
+                cboard, game_over = engine.interact_view(board, move, player)
+                if not game_over:
+                    next_frontier.append(cboard)
+
+        frontier = next_frontier
+
+    # sorted hash index followed by moves
+    keys = sorted(entries)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, *engine.SHAPE, len(keys)))
+        f.write(array.array("Q", keys).tobytes())
+        f.write(bytes([entries[k] for k in keys]))
+
+    return len(keys)
@@ -0,0 +1,142 @@
+# Time management over a whole game
+# A game clock holds the seconds left for all moves of one agent
+# Each move gets a soft target and a hard limit, searches stop past the
+# target unless the best move keeps changing between iterations
+#
+# A move clock instead gives every move the same fixed budget
+#
+# Orbs are never lost in Chain Reaction, so the orbs on board count
+# the plies played, which gives the game phase without any history
+
+
+import time
+
+
+# ---------- CONSTANTS -------------
+PLIES_PER_CELL = 2.0
+MIN_MOVES_LEFT = 8
+OPENING_FRACTION = 0.1
+OPENING_WEIGHT = 0.5
+MAX_FRACTION = 0.3
+MAX_STRETCH = 3.0
+INSTABILITY = 0.5
+MIN_MOVE_TIME = 0.01
+
+
+# ----------- CLASSES --------------
+class MoveTimer:
+    def __init__(self, clock, soft: float, hard: float):
+        """
+        Time Budget of One Move
+        -----------------------
+        - clock - game clock charged when the move is finished
+        - soft  - seconds a stable search should take
+        - hard  - seconds no search may exceed
+        """
+
+        self.clock = clock
+        self.soft = soft
+        self.hard = hard
+        self.start = time.perf_counter()
+
+        # best move of previous iteration and times it changed
+        self.best = None
+        self.changes = 0
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def target(self) -> float:
+        """ Soft target stretched by changes of the best move """
+        return min(self.hard, self.soft * (1 + INSTABILITY * self.changes))
+
+    def should_stop(self, best=None) -> bool:
+        """
+        Report best move of the latest iteration, if any
+        Returns whether the search should stop now
+        """
+        if best is not None:
+            self.changes += self.best is not None and best != self.best
+            self.best = best
+
+        return self.elapsed() >= self.target()
+
+    def can_start(self, estimate: float) -> bool:
+        """ Whether an iteration taking estimate seconds fits the target """
+        return self.elapsed() + estimate < self.target()
+
+    def finish(self) -> float:
+        """ Charge elapsed time to the clock, returns seconds used """
+        used = self.elapsed()
+        self.clock.charge(used)
+        return used
+
+
+class GameClock:
+    def __init__(self, total: float, increment=0.0):
+        """
+        Clock of One Agent
+        ------------------
+        - total     - seconds for all moves of the game
+        - increment - seconds added after every move
+        """
+
+        self.remaining = total
+        self.increment = increment
+
+    def allocate(self, board, player: int) -> tuple:
+        """
+        Returns (soft, hard) seconds for move of player on board
+        Splits remaining time over expected moves left, scaled by
+        branching factor and discounted in the opening
+        """
+
+        # setup
+        psign = -1 if player else 1
+        size = len(board)
+        plies = sum([abs(cell) for cell in board])
+        branching = len([cell for cell in board if cell * psign >= 0])
+
+        # own moves left in a game of expected length
+        expected = PLIES_PER_CELL * size
+        moves_left = max(MIN_MOVES_LEFT, (expected - plies) / 2)
+
+        # more choices get more time, openings get less
+        soft = self.remaining / moves_left * (0.5 + branching / size)
+        if plies < OPENING_FRACTION * expected:
+            soft *= OPENING_WEIGHT
+
+        # never spend much of what is left on one move
+        hard = min(soft * MAX_STRETCH, self.remaining * MAX_FRACTION)
+        hard = max(hard, MIN_MOVE_TIME)
+        return (min(soft, hard), hard)
+
+    def start_move(self, board, player: int) -> MoveTimer:
+        """ Start timing move of player on board """
+        return MoveTimer(self, *self.allocate(board, player))
+
+    def charge(self, used: float):
+        """ Subtract time used by a move, then add increment """
+        self.remaining = max(0.0, self.remaining - used) + self.increment
+
+
+class MoveClock:
+    def __init__(self, seconds: float):
+        """
+        Fixed Budget of Every Move
+        --------------------------
+        - seconds - limit of each move, unused time is not carried over
+        """
+
+        self.seconds = seconds
+
+    def allocate(self, board, player: int) -> tuple:
+        """ Returns (soft, hard) seconds, the same for every move """
+        return (self.seconds, self.seconds)
+
+    def start_move(self, board, player: int) -> MoveTimer:
+        """ Start timing move of player on board """
+        return MoveTimer(self, *self.allocate(board, player))
+
+    def charge(self, used: float):
+        """ Nothing is carried over between moves """
@@ -0,0 +1,47 @@
+import collections
+
+import chain_reaction.wrappers.engine as engine
+
+
+# ---------- ON INIT ---------------
+NODE_LIMIT = 2000
+ENEMY_CELLS = 3
+CRITICAL_FRACTION = 0.5
+MIN_ORBS = 1.0
+CACHE_SIZE = 100000
+SOLVED = collections.OrderedDict()
+
+
+# ------- WRAPPER FUNCTIONS --------
+def best_move(board: list, player: int, eng=None):
+    """
+    Get proven winning move in decided positions
+    Positions are played on eng, the selected engine if None
+    Returns None outside the endgame or if no win is proven
+    """
+    import chain_reaction.backends.python.endgame_solver as solver
+
+    # only decided positions are worth proving
+    eng = eng or engine.ENGINE
+    if not solver.is_endgame(
+        board, player, ENEMY_CELLS, CRITICAL_FRACTION, MIN_ORBS, eng
+    ):
+        return None
+
+    # solved before, possibly as part of an earlier proof
+    key = (eng.shape, tuple(board), player)
+    if key in SOLVED:
+        SOLVED.move_to_end(key)
+        return SOLVED[key]
+
+    # prove and remember winning moves along the proof
+    result, move, proof = solver.solve(board, player, NODE_LIMIT, eng)
+    for state, proof_move in proof.items():
+        SOLVED[(eng.shape, state, player)] = proof_move
+    SOLVED[key] = move if result == solver.WIN else None
+
+    # bounded cache, least recently used entries go first
+    while len(SOLVED) > CACHE_SIZE:
+        SOLVED.popitem(last=False)
+
+    return move if result == solver.WIN else None
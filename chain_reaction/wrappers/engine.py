@@ -1,168 +1,217 @@
 # The base engine driving Chain Reactions
 # Contains the bare minimum logic functions
+# Each board shape has one Engine instance holding its tables,
+# the module level functions act on the shape selected by init
 
 
-import queue
+import collections
 
 
 # ---------- ON INIT ---------------
 SHAPE = None
 NTABLE = None
+CMASS = None
+ENGINE = None
+ENGINES = {}
+interact_inplace = None
+interact_onestep = None
+interact_view = None
 
 
 # ----------- INIT -----------------
 def init(shape):
-    """ Calculate variables and cache tables """
-    global SHAPE, NTABLE
-
-    # store shape
-    SHAPE = shape
-
-    # store neighbor indices as tuple of tuples
-    s_h, s_w = shape
-    NTABLE = [0] * s_w * s_h
-    for idx in range(s_h * s_w):
-        i_y, i_x = idx // s_w, idx % s_w
-        temp = [
-            idx - s_w if i_y > 0 else None,
-            idx + s_w if i_y < s_h - 1 else None,
-            idx - 1 if i_x > 0 else None,
-            idx + 1 if i_x < s_w - 1 else None,
-        ]
-        NTABLE[idx] = tuple([i for i in temp if i is not None])
-    NTABLE = tuple(NTABLE)
+    """ Select engine of shape for module level functions """
+    global SHAPE, NTABLE, CMASS, ENGINE
+    global interact_inplace, interact_onestep, interact_view
 
+    ENGINE = get_engine(shape)
+    SHAPE = ENGINE.shape
+    NTABLE = ENGINE.ntable
+    CMASS = ENGINE.cmass
 
-# --------- CORE FUNCTIONS ------------
-def valid_board_moves(board: list, player: int) -> list:
-    """ List of all valid move indices on board for player """
-
-    psign = -1 if player else 1
-    return [i for i, b_elem in enumerate(board) if b_elem * psign >= 0]
-
-
-def interact_inplace(board: list, move: int, player: int) -> bool:
-    """
-    Interact with Chain Reaction Environment
-    Modifies board inplace
-    Note: Does not check if game was over, do checking outside
-    """
-
-    # setup
-    psign = -1 if player else 1
-    game_over = False
-
-    # using queue to sequentialize steps
-    # near cells are calculated first
-    work = queue.Queue()
-    work.put(move)
+    interact_inplace = ENGINE.interact_inplace
+    interact_onestep = ENGINE.interact_onestep
+    interact_view = ENGINE.interact_view
 
-    # store counts
-    pos, neg = 0, 0
-    for elem in board:
-        pos += elem > 0
-        neg += elem < 0
 
-    # swap counts if player is 1
-    t_frn, t_enm = (neg, pos) if player else (pos, neg)
+def get_engine(shape) -> "Engine":
+    """ Cached engine instance of shape """
+    shape = tuple(shape)
+    if shape not in ENGINES:
+        ENGINES[shape] = Engine(shape)
+    return ENGINES[shape]
 
-    while not (work.empty() or game_over):
-        # get next index in queue
-        idx = work.get()
 
-        # update territory count and game over flag
-        t_frn += 1
-        t_enm -= board[idx] * psign < 0
-        game_over = (t_frn + t_enm > 2) and (t_enm == 0)
-
-        # update orb count according to rule
-        orbct = abs(board[idx]) + 1
-        maxcp = len(NTABLE[idx])
-        board[idx] = (orbct % maxcp) * psign
-
-        # append next indices if exploded
-        if orbct == maxcp:
-            [work.put(i) for i in NTABLE[idx]]
-
-    return game_over
-
-
-def interact_onestep(board: list, moves: list, player: int) -> tuple:
-    """
-    Interact with chain reaction Environment in steps
-    Returns (next_moves, explosions, game_over)
-    """
+# --------- CORE FUNCTIONS ------------
+def valid_board_moves(board: list, player: int) -> list:
+    """ List of all valid move indices on board for player """
 
-    # setup
     psign = -1 if player else 1
-    next_moves = []
-    explosions = []
-
-    # first pass increments all cells
-    for move in moves:
-        board[move] = (abs(board[move]) + 1) * psign
-
-    # second pass gets all explosions (ignoring duplicates)
-    for move in set(moves):
-        # update orb count
-        orbct = abs(board[move])
-        maxcp = len(NTABLE[move])
-        board[move] = (orbct % maxcp) * psign
-
-        # explosion condition
-        if orbct >= maxcp:
-            explosions.append(move)
-
-            # see if neighbor is stable
-            for neighbor in NTABLE[move]:
-                ncount = (abs(board[neighbor]) + 1) % len(NTABLE[neighbor])
-
-                # append only unstable moves, else save final state
-                if ncount == 0:
-                    next_moves.append(neighbor)
-                else:
-                    board[neighbor] = (abs(board[neighbor]) + 1) * psign
-
-    # store counts
-    pos, neg = 0, 0
-    for elem in board:
-        pos += elem > 0
-        neg += elem < 0
+    return [i for i, b_elem in enumerate(board) if b_elem * psign >= 0]
 
-    # swap counts if player is 1
-    t_frn, t_enm = (neg, pos) if player else (pos, neg)
 
-    # update even next moves
-    for nmove in next_moves:
-        t_frn += 1
-        t_enm -= board[nmove] * psign < 0
+# ----------- CLASSES --------------
+class Engine:
+    def __init__(self, shape):
+        """
+        Chain Reaction Rules for one Board Shape
+        Calculates and caches neighbor table of shape
+        """
 
-    # if game is mature and any one is zero, game is over
-    game_over = (t_frn + t_enm > 2) and (t_enm <= 0)
-    return (next_moves, explosions, game_over)
+        # store shape
+        self.shape = tuple(shape)
+
+        # store neighbor indices as tuple of tuples
+        s_h, s_w = shape
+        ntable = [0] * s_w * s_h
+        for idx in range(s_h * s_w):
+            i_y, i_x = idx // s_w, idx % s_w
+            temp = [
+                idx - s_w if i_y > 0 else None,
+                idx + s_w if i_y < s_h - 1 else None,
+                idx - 1 if i_x > 0 else None,
+                idx + 1 if i_x < s_w - 1 else None,
+            ]
+            ntable[idx] = tuple([i for i in temp if i is not None])
+        self.ntable = tuple(ntable)
+
+        # critical mass of each cell
+        self.cmass = tuple([len(n) for n in self.ntable])
+
+    valid_board_moves = staticmethod(valid_board_moves)
+
+    def interact_inplace(self, board: list, move: int, player: int) -> bool:
+        """
+        Interact with Chain Reaction Environment
+        Modifies board (list or array('b')) inplace
+        Note: Does not check if game was over, do checking outside
+        """
 
+        # setup
+        ntable = self.ntable
+        cmass = self.cmass
+        psign = -1 if player else 1
+        game_over = False
+
+        # using queue to sequentialize steps
+        # near cells are calculated first
+        work = collections.deque((move,))
+        popleft, extend = work.popleft, work.extend
+
+        # store territory counts
+        if player:
+            t_enm = len([elem for elem in board if elem > 0])
+        else:
+            t_enm = len([elem for elem in board if elem < 0])
+        t_frn = len(board) - board.count(0) - t_enm
+
+        while work and not game_over:
+            # get next index in queue
+            idx = popleft()
+            orbct = board[idx] * psign
+
+            # update territory count and game over flag
+            t_frn += 1
+            if orbct < 0:
+                t_enm -= 1
+                orbct = -orbct
+            game_over = (t_frn + t_enm > 2) and (t_enm == 0)
+
+            # update orb count according to rule
+            # explode and empty cell, else stack up
+            orbct += 1
+            if orbct == cmass[idx]:
+                board[idx] = 0
+                extend(ntable[idx])
+            else:
+                board[idx] = orbct * psign
+
+        return game_over
+
+    def interact_onestep(self, board: list, moves: list, player: int) -> tuple:
+        """
+        Interact with chain reaction Environment in steps
+        Returns (next_moves, explosions, game_over)
+        """
 
-def interact_view(board: list, move: int, player: int) -> tuple:
-    """
-    Interact with Chain Reaction Environment
-    Returns view of outcome
-    """
+        # setup
+        ntable = self.ntable
+        psign = -1 if player else 1
+        next_moves = []
+        explosions = []
+
+        # first pass increments all cells
+        for move in moves:
+            board[move] = (abs(board[move]) + 1) * psign
+
+        # second pass gets all explosions (ignoring duplicates)
+        for move in set(moves):
+            # update orb count
+            orbct = abs(board[move])
+            maxcp = len(ntable[move])
+            board[move] = (orbct % maxcp) * psign
+
+            # explosion condition
+            if orbct >= maxcp:
+                explosions.append(move)
+
+                # see if neighbor is stable
+                for neighbor in ntable[move]:
+                    ncount = abs(board[neighbor]) + 1
+                    ncount %= len(ntable[neighbor])
+
+                    # append only unstable moves, else save final state
+                    if ncount == 0:
+                        next_moves.append(neighbor)
+                    else:
+                        board[neighbor] = (abs(board[neighbor]) + 1) * psign
+
+        # store counts
+        pos, neg = 0, 0
+        for elem in board:
+            pos += elem > 0
+            neg += elem < 0
+
+        # swap counts if player is 1
+        t_frn, t_enm = (neg, pos) if player else (pos, neg)
+
+        # update even next moves
+        for nmove in next_moves:
+            t_frn += 1
+            t_enm -= board[nmove] * psign < 0
+
+        # if game is mature and any one is zero, game is over
+        game_over = (t_frn + t_enm > 2) and (t_enm <= 0)
+        return (next_moves, explosions, game_over)
+
+    def interact_view(self, board: list, move: int, player: int) -> tuple:
+        """
+        Interact with Chain Reaction Environment
+        Returns view of outcome
+        """
 
-    board_dupl = board[:]
-    gmovr = interact_inplace(board_dupl, move, player)
+        board_dupl = board[:]
+        gmovr = self.interact_inplace(board_dupl, move, player)
 
-    return (board_dupl, gmovr)
+        return (board_dupl, gmovr)
 
 
-# ----------- CLASSES --------------
 class ChainReactionGame:
-    def __init__(self):
-        """ Chain Reaction Game Engine """
-        assert SHAPE, "Game Engine Module Not Initialized"
+    def __init__(self, engine=None):
+        """
+        Chain Reaction Game Engine
+        Plays on engine, or on the shape selected by init
+        """
+        assert engine or SHAPE, "Game Engine Module Not Initialized"
+
+        # rules of board shape
+        self.engine = engine or ENGINE
+        self.shape = self.engine.shape
 
         # game state
-        self.board = [0] * SHAPE[0] * SHAPE[1]
+        self.board = [0] * self.shape[0] * self.shape[1]
         self.player = 0
+        self.history = []
 
         # outcome
         self.game_over = False
@@ -177,7 +226,8 @@ class ChainReactionGame:
         """
 
         # setup
-        index = move if type(move) is int else move[0] * SHAPE[1] + move[1]
+        s_w = self.shape[1]
+        index = move if type(move) is int else move[0] * s_w + move[1]
         psign = -1 if self.player else 1
 
         # invalid condition
@@ -185,7 +235,10 @@ class ChainReactionGame:
             return False
 
         # interact inplace
-        self.game_over = interact_inplace(self.board, index, self.player)
+        self.history.append(index)
+        self.game_over = self.engine.interact_inplace(
+            self.board, index, self.player
+        )
         self.winner = self.player if self.game_over else 2
 
         # toggle player
@@ -194,13 +247,21 @@ class ChainReactionGame:
 
 
 class ChainReactionAnimated:
-    def __init__(self):
-        """ Chain Reaction Animation Engine """
-        assert SHAPE, "Game Engine Module Not Initialized"
+    def __init__(self, engine=None):
+        """
+        Chain Reaction Animation Engine
+        Plays on engine, or on the shape selected by init
+        """
+        assert engine or SHAPE, "Game Engine Module Not Initialized"
+
+        # rules of board shape
+        self.engine = engine or ENGINE
+        self.shape = self.engine.shape
 
         # game state
-        self.board = [0] * SHAPE[0] * SHAPE[1]
+        self.board = [0] * self.shape[0] * self.shape[1]
         self.player = 0
+        self.history = []
 
         # intermediate states
         self.pending_moves = []
@@ -216,7 +277,8 @@ class ChainReactionAnimated:
         Note: Call get_next_step repeatedly until board is stable
         """
         # setup
-        index = move if type(move) is int else move[0] * SHAPE[1] + move[1]
+        s_w = self.shape[1]
+        index = move if type(move) is int else move[0] * s_w + move[1]
         psign = -1 if self.player else 1
 
         # invalid condition
@@ -224,6 +286,7 @@ class ChainReactionAnimated:
             return False
 
         self.pending_moves = [index]
+        self.history.append(index)
         return True
 
     def get_next_step(self) -> tuple:
@@ -239,7 +302,9 @@ class ChainReactionAnimated:
 
         # save previous board for animation
         previous_board = self.board[:]
-        res = interact_onestep(self.board, self.pending_moves, self.player)
+        res = self.engine.interact_onestep(
+            self.board, self.pending_moves, self.player
+        )
 
         # unpack res and update
         self.pending_moves, explosions, self.game_over = res
@@ -0,0 +1,169 @@
+# Evaluation caches for repeated positions
+# Entries are keyed by (board, player, depth, margin), values are lists
+# of ints, margin tells apart searches whose root window differs
+# Each process keeps a bounded LRU dictionary, optionally backed by
+# a direct mapped table in shared memory that worker processes attach to
+#
+# Shared slot layout : tag (uint64), check (uint64), board (int8 x size),
+#                      player (uint8), depth (int8), margin (int32),
+#                      values (int32 x width)
+# A slot is valid when its tag is non zero, its key matches and check
+# is the hash of key and values, so entries torn by writers of other
+# processes racing on the same slot are skipped
+
+
+import collections
+import struct
+import threading
+
+
+# ----------- CLASSES --------------
+class SharedTable:
+    def __init__(self, name: str, slots: int, size: int, width: int):
+        """
+        Direct Mapped Table in Shared Memory
+        ------------------------------------
+        - name  - shared memory block name, attached if it exists
+        - slots - number of entries, colliding keys replace each other
+        - size  - cells of the board
+        - width - values stored per entry
+        """
+
+        from multiprocessing import shared_memory
+
+        self.slots = slots
+        self.layout = struct.Struct("<QQ%dbBbi%di" % (size, width))
+        self.tag = struct.Struct("<Q")
+        self.size = size
+
+        # first process to get here owns the block
+        nbytes = slots * self.layout.size
+        try:
+            self.shm = shared_memory.SharedMemory(name, True, nbytes)
+            self.owner = True
+        except FileExistsError:
+            self.shm = shared_memory.SharedMemory(name)
+            self.owner = False
+
+    def get(self, key: tuple):
+        """ Values stored for key or None """
+        tag, offset = self.locate(key)
+        entry = self.layout.unpack_from(self.shm.buf, offset)
+
+        # empty, collided, being written or torn
+        if entry[0] != tag or entry[2 : self.size + 5] != key:
+            return None
+        if entry[1] != self.check(entry[2:]):
+            return None
+        if self.tag.unpack_from(self.shm.buf, offset)[0] != tag:
+            return None
+
+        return list(entry[self.size + 5 :])
+
+    def put(self, key: tuple, values: list):
+        """ Store values for key, readers skip the slot meanwhile """
+        tag, offset = self.locate(key)
+        self.tag.pack_into(self.shm.buf, offset, 0)
+        check = self.check((*key, *values))
+        self.layout.pack_into(self.shm.buf, offset, 0, check, *key, *values)
+        self.tag.pack_into(self.shm.buf, offset, tag)
+
+    def check(self, fields: tuple) -> int:
+        """ Checksum of key and values stored in a slot """
+        return hash(fields) & 0xFFFFFFFFFFFFFFFF
+
+    def locate(self, key: tuple) -> tuple:
+        """ Returns (non zero tag, byte offset) of key's slot """
+        # hashes of int tuples are the same in every process
+        tag = hash(key) & 0xFFFFFFFFFFFFFFFF or 1
+        return (tag, (tag % self.slots) * self.layout.size)
+
+    def close(self):
+        """ Detach, the owning process also frees the block """
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class EvalCache:
+    def __init__(self, capacity: int, size: int, width=1, shared=None):
+        """
+        Bounded Evaluation Cache
+        ------------------------
+        - capacity - entries kept in this process (LRU eviction)
+        - size     - cells of the board
+        - width    - values stored per entry
+        - shared   - optional shared memory name for a second level
+        """
+
+        self.capacity = capacity
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.shared = None
+        if shared:
+            self.shared = SharedTable(shared, 4 * capacity, size, width)
+
+        # counters
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(
+        self, func, board, player: int, depth: int, margin=0, keep=None
+    ) -> list:
+        """
+        Cached result of func(board, player, depth)
+        margin only keys the entry, func must already apply it
+        A new result is only stored if keep is None or keep() is true
+        """
+        key = (*board, player, depth, margin)
+
+        # local entries first
+        with self.lock:
+            values = self.entries.get(key)
+            if values is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return values[:]
+
+        # then other processes' entries
+        values = self.shared.get(key) if self.shared else None
+        if values is None:
+            values = func(board, player, depth)
+            values = values if isinstance(values, list) else list(values)
+            if keep is not None and not keep():
+                return values
+            if self.shared:
+                self.shared.put(key, values)
+            hit = False
+        else:
+            hit = True
+
+        with self.lock:
+            self.hits += hit
+            self.misses += not hit
+            self.entries[key] = values
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+        return values[:]
+
+    def stats(self) -> dict:
+        """ Hit and miss counters """
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+    def close(self):
+        """ Release shared memory """
+        if self.shared:
+            self.shared.close()
+            self.shared = None
@@ -1,13 +1,135 @@
-import chain_reaction.backends.python.mcts_agent as mcts
+# Backends are imported on first use, so that importing
+# this module stays cheap for processes that never search
+
+
+import random
+
+import chain_reaction.wrappers.book as book
+import chain_reaction.wrappers.endgame as endgame
+import chain_reaction.wrappers.engine as engine
+
+
+# ---------- ON INIT ---------------
+PONDER_VISITS = 200000
 
 
 # ------- WRAPPER FUNCTIONS --------
-def best_move(board: list, player: int, time_limit: float, c_param=1.4) -> int:
+def best_move(
+    board: list,
+    player: int,
+    time_limit: float,
+    c_param=1.4,
+    ponder=None,
+    rollout="random",
+    cutoff=0,
+    selection="uct",
+    rave_k=0,
+    threads=1,
+    evaluator=None,
+    batch_size=8,
+    rng=None,
+    playouts=0,
+    clock=None,
+    eng=None,
+) -> int:
     """
     Get best move from Monte Carlo Tree Search Method
     Returns within time limit
+    Ponder is a dict one agent keeps between its moves, if given
+    searching goes on during opponent's turn in a tree kept in it
+    Rollouts use policy rollout and stop after cutoff plies if nonzero
+    Tree descent uses selection rule uct or puct (with move priors)
+    Nonzero rave_k shares statistics of moves across siblings (RAVE)
+    More than one thread searches a shared tree with virtual loss
+    An evaluator values leaves in batches instead of rollouts
+    Random choices are drawn from rng (a random.Random), nonzero
+    playouts stops searches early, both together make runs reproducible
+    With a game clock, time_limit is replaced by the clock's budget
+    Board is played on eng, the selected engine if None
+    """
+    import chain_reaction.backends.python.mcts_agent as mcts
+
+    rng = rng or random
+    eng = eng or engine.ENGINE
+    # warm tree from search on opponent's time
+    rootnode = None
+    if ponder is not None and "ponderer" in ponder:
+        rootnode = ponder.pop("ponderer").stop(board, player)
+
+    # answer book positions instantly,
+    # then play proven wins in decided positions
+    move = book.lookup(board, player, eng.shape)
+    if move is None:
+        move = endgame.best_move(board, player, eng)
+
+    # budget of move from game clock
+    timer = None
+    if move is None and clock is not None:
+        timer = clock.start_move(board, player)
+        time_limit = timer.hard
+
+    # redirect to backend
+    if move is None:
+        move = mcts.best_action(
+            board,
+            player,
+            time_limit,
+            c_param,
+            rootnode,
+            rollout,
+            cutoff,
+            selection,
+            rave_k,
+            threads,
+            evaluator,
+            batch_size,
+            rng,
+            playouts,
+            timer,
+            eng,
+        )
+    if timer is not None:
+        timer.finish()
+
+    # search resulting position until next call
+    if ponder is not None:
+        next_board, game_over = eng.interact_view(board, move, player)
+        if not game_over:
+            rootnode = mcts.new_root(
+                next_board, 1 - player, selection, rave_k, eng
+            )
+            stream = random.Random(rng.getrandbits(64))
+            ponder["ponderer"] = mcts.MCTSPonderer(
+                rootnode, c_param, PONDER_VISITS, rollout, cutoff, stream
+            )
+
+    return move
+
+
+def best_move_multi(
+    state: tuple,
+    player: int,
+    time_limit: float,
+    c_param=1.4,
+    rng=None,
+    playouts=0,
+    eng=None,
+) -> int:
+    """
+    Get best move for games with more than two players
+    state is (owners, counts, alive, turns) of multiplayer engine,
+    played on eng (the selected engine if None)
     """
+    import chain_reaction.backends.python.mcts_multi_agent as mcts_multi
 
     # redirect to backend
-    return mcts.best_action(board, player, time_limit, c_param)
+    return mcts_multi.best_action(
+        state, player, time_limit, c_param, rng or random, playouts, eng
+    )
+
+
+def ponder_stop(ponder: dict):
+    """ Stop background search kept in ponder by best_move """
 
+    if "ponderer" in ponder:
+        ponder.pop("ponderer").stop()
@@ -3,50 +3,357 @@
 # The sole reason of their existance is to keep the linter happy.
 
 
+import math
 import random
+import threading
+import time
+
+import chain_reaction.wrappers.book as book
+import chain_reaction.wrappers.endgame as endgame
+import chain_reaction.wrappers.engine as engine
+import chain_reaction.wrappers.evalcache as evalcache
 
 
 # ---------- ON INIT ---------------
 load_scores = None
+deepen_scores = None
+CACHES = []
+POOLS = []
 
 
 # ----------- INIT -----------------
-def init(backend: str):
+def init(
+    backend: str, evaluator=None, cache_size=0, shared_cache=None, workers=1
+):
+    """
+    Select backend for minimax searches
+    cache_size > 0 keeps up to that many load_scores results,
+    shared_cache names a shared memory block for worker processes
+    workers > 1 splits root moves over threads (c) or processes (python)
+    load_scores(board, player, depth, margin=0, eng=None, halted=None)
+    is exact within margin of the best score, other moves get upper
+    bounds, boards are played on eng (the selected engine if None, c
+    searches 9x6 only), halted is a bytearray(1) flag of the search,
+    which returns early with meaningless scores once halted[0] is set
+    deepen_scores(board, player, depth, seconds, margin=0, halted=None) is
+    set if the backend deepens on its own, returning (scores, depth)
+    within seconds
+    """
+
+    global load_scores, deepen_scores
 
-    global load_scores
+    cache_close()
+    pool_close()
 
     # setting up c engine
     if backend == "c":
         import chain_reaction.backends.c_ext.minimax_agent as cagent
 
-        load_scores = cagent.load_scores
+        # invalid condition
+        if evaluator is not None:
+            raise ValueError("Evaluators need the python backend")
+
+        # root moves split over native threads
+        load_scores = lambda b, p, d, m=0, e=None, h=None: (
+            cagent.load_scores(b, p, d, max(workers, 1), m, h)
+        )
+        deepen_scores = lambda b, p, d, s, m=0, h=None: cagent.timed_scores(
+            b, p, d, s, max(workers, 1), m, h
+        )
 
     # setting up python engine
     else:
         import chain_reaction.backends.python.minimax_agent as pagent
 
+        pagent.EVALUATOR = evaluator
+        deepen_scores = None
         load_scores = pagent.load_scores
 
+        # root moves split over worker processes sharing alpha
+        if workers > 1:
+            import multiprocessing
+
+            alpha = multiprocessing.Value("i", -10000)
+            pool_halted = multiprocessing.RawArray("b", 1)
+            qdepth = pagent.QUIESCENCE_DEPTH
+            pool = multiprocessing.Pool(
+                workers,
+                initializer=pagent.pool_init,
+                initargs=(engine.SHAPE, alpha, pool_halted, evaluator, qdepth),
+            )
+            lock = threading.Lock()
+            POOLS.append(pool)
+
+            # one search at a time owns the shared alpha and halt flag
+            def parallel_scores(
+                board, player, depth, margin=0, eng=None, halted=None
+            ):
+                with lock:
+                    return pagent.load_scores_parallel(
+                        board,
+                        player,
+                        depth,
+                        pool,
+                        alpha,
+                        pool_halted,
+                        margin,
+                        eng,
+                        halted,
+                    )
+
+            load_scores = parallel_scores
+
+    # evaluation cache in front of searches
+    if cache_size > 0:
+        size = engine.SHAPE[0] * engine.SHAPE[1]
+        name = shared_cache and shared_cache + "-scores"
+        cache = evalcache.EvalCache(cache_size, size, size, name)
+        cache_shape, search = engine.SHAPE, load_scores
+
+        # entries hold boards of the shape selected here,
+        # scores of halted searches are never kept
+        def cached_scores(
+            board, player, depth, margin=0, eng=None, halted=None
+        ):
+            if (eng or engine.ENGINE).shape != cache_shape:
+                return search(board, player, depth, margin, eng, halted)
+            return cache.lookup(
+                lambda *args: search(*args, margin, eng, halted),
+                board,
+                player,
+                depth,
+                margin,
+                None if halted is None else lambda: not halted[0],
+            )
+
+        load_scores = cached_scores
+        CACHES.append(cache)
+
+
+# ----------- CLASSES --------------
+class MinimaxPonderer:
+    def __init__(self, board, player, depth, margin=0, eng=None):
+        """
+        Precompute Replies on Opponent's Time
+        -------------------------------------
+        - board  - board after our move
+        - player - our player, enemy is to move on board
+        - depth  - search depth used for our next move
+        - margin - root margin used for our next move
+        - eng    - engine of board, the selected engine if None
+        """
+
+        self.scores = {}
+        self.engine = eng or engine.ENGINE
+
+        # search thread, its searches are halted through the flag
+        self.halted = bytearray(1)
+        self.thread = threading.Thread(
+            target=self.run, args=(board, player, depth, margin), daemon=True
+        )
+        self.thread.start()
+
+    def run(self, board, player, depth, margin):
+        """ Load scores of replies, most likely enemy replies first """
+        enemy = 1 - player
+        eng, halted = self.engine, self.halted
+
+        # enemy's own shallow scores rank its replies
+        replies = load_scores(board, enemy, 1, 0, eng, halted)
+        ordered = sorted(range(len(board)), key=lambda x: -replies[x])
+
+        for idx in ordered:
+            # halted or only invalid moves remain
+            if halted[0] or replies[idx] < -10000:
+                return
+
+            # enemy wins, nothing to precompute
+            reply, game_over = eng.interact_view(board, idx, enemy)
+            if game_over:
+                continue
+
+            # scores of a halted search are meaningless
+            scores = load_scores(reply, player, depth, margin, eng, halted)
+            if halted[0]:
+                return
+            self.scores[tuple(reply)] = scores
+
+    def stop(self, board=None):
+        """
+        Stop pondering and return precomputed scores for board
+        The running search is halted and waited for
+        """
+        self.halted[0] = 1
+        self.thread.join()
+        return self.scores.get(tuple(board)) if board else None
+
 
 # ------- WRAPPER FUNCTIONS --------
-def best_move(board: list, player: int, depth: int, randn: int) -> int:
+def timed_scores(
+    board, player: int, max_depth: int, clock, margin=0, eng=None
+):
+    """
+    Iterative deepening within the move budget of a game clock
+    A deeper search starts only if it is expected to end in time,
+    changes of the best move between depths extend the budget
+    Backends that deepen on their own get the budget in one call,
+    without the extension
+    Returns (scores of deepest search, its depth)
+    """
+
+    timer = clock.start_move(board, player)
+
+    # backend keeps its own iterations
+    if deepen_scores is not None:
+        score_list, depth = deepen_scores(
+            board, player, max_depth, timer.target(), margin
+        )
+        timer.finish()
+        return (score_list, depth)
+    score_list, depth, estimate = None, 0, 0.0
+    spent = None
+
+    while depth < max_depth:
+        # depth 1 always runs, deeper ones only if they fit
+        if score_list is not None and not timer.can_start(estimate):
+            break
+
+        start = time.perf_counter()
+        scores = load_scores(board, player, depth + 1, margin, eng)
+        previous, spent = spent, time.perf_counter() - start
+        score_list, depth = scores, depth + 1
+
+        # next depth grows by the last growth, or by moves at first
+        if previous:
+            estimate = spent * max(spent / previous, 1.0)
+        else:
+            estimate = spent * len([x for x in scores if x > -20000])
+
+        # proven win, or budget used up
+        best = max(range(len(scores)), key=lambda x: scores[x])
+        if scores[best] == 10000 or timer.should_stop(best):
+            break
+
+    timer.finish()
+    return (score_list, depth)
+
+
+def candidate_moves(score_list: list, margin=0) -> list:
+    """
+    Moves whose scores are positive and within margin of the best
+    Scores of load_scores searched with the same margin are exact there
+    """
+    best = max(score_list)
+    return [
+        idx
+        for idx, score in enumerate(score_list)
+        if score > 0 and score >= best - margin
+    ]
+
+
+def select_move(score_list: list, margin=0, temperature=0.0, rng=None):
+    """
+    Choose move from scores of load_scores searched with margin
+    Candidates are drawn with weights exp((score - best) / temperature)
+    Zero temperature, a winning move or no positive score picks the best
     """
-    Get weighted random choice of best n moves
+
+    best = max(range(len(score_list)), key=lambda x: score_list[x])
+    candidates = candidate_moves(score_list, margin)
+
+    # no random choice
+    if score_list[best] == 10000 or temperature <= 0 or len(candidates) < 2:
+        return best
+
+    top = score_list[best]
+    weights = [
+        math.exp((score_list[x] - top) / temperature) for x in candidates
+    ]
+    return (rng or random).choices(candidates, weights)[0]
+
+
+def best_move(
+    board: list,
+    player: int,
+    depth: int,
+    margin=0,
+    temperature=0.0,
+    ponder=None,
+    rng=None,
+    clock=None,
+    eng=None,
+) -> int:
+    """
+    Get random choice of moves within margin of the best score
+    Root moves that cannot score within margin are cut off
+    Temperature sets how much better moves are preferred
     If there is an immediate winning move, always return it
+    Ponder is a dict one agent keeps between its moves, if given
+    replies are precomputed during opponent's turn and kept in it
+    Random choice is drawn from rng (a random.Random) if given
+    With a game clock, searches deepen up to depth within its budget
+    Board is played on eng, the selected engine if None
     """
 
-    # make a list of (move, score)
-    score_list = load_scores(board, player, depth)
-    heatmap = list(enumerate(score_list))
+    eng = eng or engine.ENGINE
 
-    # get random move with decreasing weights
-    heatmap.sort(key=lambda x: x[1], reverse=True)
-    m_moves = [i[0] for i in heatmap if i[1] > 0][:randn]
-    weights = [6, 4, 2, 1, 1][: len(m_moves)]
+    # scores precomputed on opponent's time
+    score_list = None
+    if ponder is not None and "ponderer" in ponder:
+        score_list = ponder.pop("ponderer").stop(board)
 
-    # if there is a winning move or no random choice return
-    # return random choice if more than one score is positive
-    if heatmap[0][1] == 10000 or len(m_moves) <= 1:
-        return heatmap[0][0]
-    else:
-        return random.choices(m_moves, weights)[0]
+    # answer book positions instantly,
+    # then play proven wins in decided positions
+    move = book.lookup(board, player, eng.shape)
+    if move is None:
+        move = endgame.best_move(board, player, eng)
+
+    # scores exact within margin of the best
+    if move is None:
+        if score_list is None and clock is not None:
+            score_list, depth = timed_scores(
+                board, player, depth, clock, margin, eng
+            )
+        elif score_list is None:
+            score_list = load_scores(board, player, depth, margin, eng)
+        move = select_move(score_list, margin, temperature, rng)
+
+    # precompute replies to resulting position until next call
+    if ponder is not None:
+        next_board, game_over = eng.interact_view(board, move, player)
+        if not game_over:
+            ponder["ponderer"] = MinimaxPonderer(
+                next_board, player, depth, margin, eng
+            )
+
+    return move
+
+
+def ponder_stop(ponder: dict):
+    """ Stop background search kept in ponder by best_move """
+
+    if "ponderer" in ponder:
+        ponder.pop("ponderer").stop()
+
+
+def cache_stats() -> list:
+    """ Counters of load_scores caches in use """
+
+    return [cache.stats() for cache in CACHES]
+
+
+def pool_close():
+    """ Shut down worker processes of root splitting """
+
+    for pool in POOLS:
+        pool.terminate()
+    POOLS.clear()
+
+
+def cache_close():
+    """ Drop evaluation caches and release shared memory """
+
+    for cache in CACHES:
+        cache.clear()
+        cache.close()
+    CACHES.clear()
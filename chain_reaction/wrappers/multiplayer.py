@@ -0,0 +1,190 @@
+# Engine for Chain Reactions with 2 to 8 players
+# Boards are (owners, counts) pairs of int8 arrays, owner -1 is empty
+# Uses the tables of two player engine instances, boards are played on
+# the engine passed in, or on the shape selected by engine.init
+
+
+import array
+import collections
+
+import chain_reaction.wrappers.engine as engine
+
+
+# ---------- CONSTANTS -------------
+EMPTY = -1
+MAX_PLAYERS = 8
+
+
+# --------- CORE FUNCTIONS ------------
+def new_board(eng=None) -> tuple:
+    """ Empty (owners, counts) board of eng, the selected engine if None """
+
+    shape = (eng or engine.ENGINE).shape
+    size = shape[0] * shape[1]
+    return (array.array("b", [EMPTY] * size), array.array("b", [0] * size))
+
+
+def valid_board_moves(owners, player: int) -> list:
+    """ List of all valid move indices on board for player """
+
+    return [i for i, owner in enumerate(owners) if owner in (EMPTY, player)]
+
+
+def interact_inplace(
+    owners, counts, move: int, player: int, eng=None
+) -> bool:
+    """
+    Interact with Chain Reaction Environment
+    Modifies owners and counts inplace, played on eng if given
+    Returns True if the move captured every enemy cell
+    """
+
+    # setup
+    eng = eng or engine.ENGINE
+    ntable = eng.ntable
+    cmass = eng.cmass
+    captured = False
+    game_over = False
+
+    # using queue to sequentialize steps
+    # near cells are calculated first
+    work = collections.deque([move])
+
+    # enemy territory count
+    enemies = 0
+    for owner in owners:
+        enemies += owner != EMPTY and owner != player
+
+    while work and not game_over:
+        # get next index in queue
+        idx = work.popleft()
+
+        # conquer cell and update game over flag
+        if owners[idx] != player:
+            if owners[idx] != EMPTY:
+                enemies -= 1
+                captured = True
+            owners[idx] = player
+        game_over = captured and enemies == 0
+
+        # update orb count according to rule
+        orbct = counts[idx] + 1
+        maxcp = cmass[idx]
+
+        # explode and empty cell, else stack up
+        if orbct == maxcp:
+            counts[idx] = 0
+            owners[idx] = EMPTY
+            work.extend(ntable[idx])
+        else:
+            counts[idx] = orbct
+
+    return game_over
+
+
+def next_player(owners, player: int, alive: tuple, turns: int) -> tuple:
+    """
+    Skip eliminated players after player has moved
+    Players without cells are out once everyone has moved
+    Returns (next player, alive)
+    """
+
+    # everyone gets the first turn
+    nplayers = len(alive)
+    if turns >= nplayers:
+        present = set(owners)
+        alive = tuple([alive[p] and p in present for p in range(nplayers)])
+
+    # rotate turns over remaining players
+    nxt = (player + 1) % nplayers
+    while not alive[nxt]:
+        nxt = (nxt + 1) % nplayers
+
+    return (nxt, alive)
+
+
+def interact_view(state: tuple, move: int, player: int, eng=None) -> tuple:
+    """
+    Interact with Chain Reaction Environment
+    state is (owners, counts, alive, turns), played on eng if given
+    Returns (next state, next player, game over)
+    """
+
+    # copy compact buffers
+    owners, counts, alive, turns = state
+    owners, counts = owners[:], counts[:]
+
+    # player wins if game is over
+    game_over = interact_inplace(owners, counts, move, player, eng)
+    if game_over:
+        return ((owners, counts, alive, turns + 1), player, True)
+
+    nxt, alive = next_player(owners, player, alive, turns + 1)
+    return ((owners, counts, alive, turns + 1), nxt, False)
+
+
+# ----------- CLASSES --------------
+class ChainReactionMultiGame:
+    def __init__(self, nplayers: int, eng=None):
+        """
+        Chain Reaction Game Engine for many players
+        Plays on eng, or on the shape selected by engine.init
+        """
+        assert eng or engine.SHAPE, "Game Engine Module Not Initialized"
+        assert 2 <= nplayers <= MAX_PLAYERS, "Invalid number of players"
+
+        # rules of board shape
+        self.engine = eng or engine.ENGINE
+        self.shape = self.engine.shape
+
+        # game state
+        self.nplayers = nplayers
+        self.owners, self.counts = new_board(self.engine)
+        self.alive = (True,) * nplayers
+        self.player = 0
+        self.turns = 0
+
+        # outcome
+        self.game_over = False
+        self.winner = nplayers
+
+    @property
+    def state(self) -> tuple:
+        """ State tuple for agents """
+        return (self.owners, self.counts, self.alive, self.turns)
+
+    def make_move(self, move) -> bool:
+        """
+        Calculate the next state of the board
+        -------------------------------------
+        Input   : move index (tuple or int)
+        Returns : success boolean
+        """
+
+        # setup
+        s_w = self.shape[1]
+        index = move if type(move) is int else move[0] * s_w + move[1]
+        owner = self.owners[index]
+
+        # invalid condition
+        if (owner != EMPTY and owner != self.player) or self.game_over:
+            return False
+
+        # interact inplace
+        self.game_over = interact_inplace(
+            self.owners, self.counts, index, self.player, self.engine
+        )
+        self.winner = self.player if self.game_over else self.nplayers
+        self.turns += 1
+
+        # winner is the last one standing
+        if self.game_over:
+            winner = self.player
+            self.alive = tuple([p == winner for p in range(self.nplayers)])
+            return True
+
+        # rotate to next alive player
+        self.player, self.alive = next_player(
+            self.owners, self.player, self.alive, self.turns
+        )
+        return True
@@ -0,0 +1,176 @@
+# Compact game records
+# Binary form : magic, rows, cols, flags, varint move count,
+#               varint moves, then optional varint timings (ms)
+#               and varint search stats (nodes), one per move
+# Text form   : "9x6" header line, then one token per move
+#               "row,col" with optional ":ms" and "/nodes"
+
+
+import chain_reaction.wrappers.engine as engine
+
+
+# ---------- FILE FORMAT -----------
+MAGIC = b"CRG1"
+FLAG_TIMINGS = 1
+FLAG_STATS = 2
+
+
+# ------------ UTILITIES -------------
+def encode_varint(value: int, out: bytearray):
+    """ Append unsigned LEB128 encoding of value """
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(data: bytes, pos: int) -> tuple:
+    """ Returns (value, next position) """
+    value, shift = 0, 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return (value, pos)
+        shift += 7
+
+
+# ----------- CLASSES --------------
+class GameRecord:
+    def __init__(self, shape, moves=None, timings=None, stats=None):
+        """
+        Record of a Two Player Game
+        ---------------------------
+        - shape   - board shape (rows, cols)
+        - moves   - move indices in order of play
+        - timings - optional milliseconds spent on each move
+        - stats   - optional search nodes of each move
+        """
+        self.shape = tuple(shape)
+        self.moves = list(moves or [])
+        self.timings = timings
+        self.stats = stats
+
+    @classmethod
+    def from_game(cls, game):
+        """ Record of moves played so far in game instance """
+        return cls(game.shape, game.history)
+
+    def append(self, move: int, time_ms=None, nodes=None):
+        """
+        Add move with optional timing and search stats
+        Columns stay one value per move, missing values are stored as 0
+        """
+        self.moves.append(move)
+
+        if time_ms is not None and self.timings is None:
+            self.timings = [0] * (len(self.moves) - 1)
+        if self.timings is not None:
+            self.timings.append(int(time_ms or 0))
+
+        if nodes is not None and self.stats is None:
+            self.stats = [0] * (len(self.moves) - 1)
+        if self.stats is not None:
+            self.stats.append(int(nodes or 0))
+
+    def to_bytes(self) -> bytes:
+        """ Compact binary form """
+        flags = FLAG_TIMINGS if self.timings else 0
+        flags |= FLAG_STATS if self.stats else 0
+
+        out = bytearray(MAGIC)
+        out += bytes([self.shape[0], self.shape[1], flags])
+        encode_varint(len(self.moves), out)
+
+        # moves, then optional columns
+        for column in (self.moves, self.timings, self.stats):
+            for value in column or []:
+                encode_varint(value, out)
+
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        """ Parse compact binary form """
+        if data[:4] != MAGIC:
+            raise ValueError("Not a game record")
+
+        shape, flags = (data[4], data[5]), data[6]
+        count, pos = decode_varint(data, 7)
+
+        # read one column of count varints
+        def column():
+            nonlocal pos
+            values = []
+            for _ in range(count):
+                value, pos = decode_varint(data, pos)
+                values.append(value)
+            return values
+
+        moves = column()
+        timings = column() if flags & FLAG_TIMINGS else None
+        stats = column() if flags & FLAG_STATS else None
+        return cls(shape, moves, timings, stats)
+
+    def write(self, path: str):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def read(cls, path: str):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    def to_text(self) -> str:
+        """ Human readable form """
+        s_w = self.shape[1]
+        tokens = []
+
+        for ply, move in enumerate(self.moves):
+            token = "%d,%d" % (move // s_w, move % s_w)
+            token += ":%d" % self.timings[ply] if self.timings else ""
+            token += "/%d" % self.stats[ply] if self.stats else ""
+            tokens.append(token)
+
+        header = "%dx%d" % self.shape
+        return header + "\n" + " ".join(tokens) + "\n"
+
+    @classmethod
+    def from_text(cls, text: str):
+        """ Parse human readable form """
+        header, _, body = text.strip().partition("\n")
+        shape = tuple([int(x) for x in header.split("x")])
+        record = cls(shape)
+
+        for token in body.split():
+            token, _, nodes = token.partition("/")
+            token, _, time_ms = token.partition(":")
+            row, col = [int(x) for x in token.split(",")]
+            record.append(
+                row * shape[1] + col,
+                int(time_ms) if time_ms else None,
+                int(nodes) if nodes else None,
+            )
+
+        return record
+
+
+# ------------- REPLAY ---------------
+def replay(record: GameRecord, ply=None) -> tuple:
+    """
+    Reconstruct position after ply moves (all moves if None)
+    Returns (board, player to move, game over)
+    """
+
+    # setup
+    interact_inplace = engine.get_engine(record.shape).interact_inplace
+    board = [0] * record.shape[0] * record.shape[1]
+    moves = record.moves if ply is None else record.moves[:ply]
+    player, game_over = 0, False
+
+    for move in moves:
+        game_over = interact_inplace(board, move, player)
+        player = 1 - player
+
+    return (board, player, game_over)
@@ -0,0 +1,125 @@
+# Board symmetries of Chain Reaction
+# Mirrored and rotated boards play identically, so boards and moves
+# are mapped to a canonical form to share search work and book entries
+
+
+import chain_reaction.wrappers.engine as engine
+
+
+# ---------- ON INIT ---------------
+TABLES = {}
+
+
+# ----------- INIT -----------------
+def tables(shape=None) -> tuple:
+    """
+    Index permutations of all symmetries of boards of shape
+    Shape of the selected engine if None, calculated once per shape
+    Identity is always the first permutation
+    Returns (permutations, inverses)
+    """
+
+    # tables of shapes seen before are reused
+    shape = tuple(shape or engine.SHAPE)
+    if shape in TABLES:
+        return TABLES[shape]
+    s_h, s_w = shape
+
+    # (y, x) -> (y, x) maps of rectangular boards
+    maps = [
+        lambda y, x: (y, x),
+        lambda y, x: (y, s_w - 1 - x),
+        lambda y, x: (s_h - 1 - y, x),
+        lambda y, x: (s_h - 1 - y, s_w - 1 - x),
+    ]
+
+    # square boards also have diagonal symmetries
+    if s_h == s_w:
+        maps += [
+            lambda y, x: (x, y),
+            lambda y, x: (s_w - 1 - x, s_h - 1 - y),
+            lambda y, x: (x, s_h - 1 - y),
+            lambda y, x: (s_w - 1 - x, y),
+        ]
+
+    # permutation maps index to its image
+    permutations = []
+    for sym_map in maps:
+        coords = [sym_map(idx // s_w, idx % s_w) for idx in range(s_h * s_w)]
+        permutations.append(tuple(y * s_w + x for y, x in coords))
+
+    # inverse maps image back to index
+    inverses = []
+    for perm in permutations:
+        inverse = [0] * len(perm)
+        for idx, image in enumerate(perm):
+            inverse[image] = idx
+        inverses.append(tuple(inverse))
+
+    TABLES[shape] = (tuple(permutations), tuple(inverses))
+    return TABLES[shape]
+
+
+# --------- CORE FUNCTIONS ------------
+def transform(board: list, sym: int, shape=None) -> tuple:
+    """ Board after applying symmetry sym """
+    inverses = tables(shape)[1]
+    return tuple([board[i] for i in inverses[sym]])
+
+
+def transform_move(move: int, sym: int, shape=None) -> int:
+    """ Move index after applying symmetry sym """
+    return tables(shape)[0][sym][move]
+
+
+def restore_move(move: int, sym: int, shape=None) -> int:
+    """ Move index before applying symmetry sym """
+    return tables(shape)[1][sym][move]
+
+
+def canonical(board: list, shape=None) -> tuple:
+    """
+    Canonical form of board among all its symmetries
+    Returns (canonical board tuple, symmetry applied)
+    """
+    inverses = tables(shape)[1]
+
+    best_board, best_sym = tuple(board), 0
+    for sym in range(1, len(inverses)):
+        sym_board = tuple([board[i] for i in inverses[sym]])
+        if sym_board < best_board:
+            best_board, best_sym = sym_board, sym
+
+    return (best_board, best_sym)
+
+
+def move_representatives(board: list, shape=None):
+    """
+    Smallest move index equivalent to each move on board
+    Returns None if board has no symmetry (most boards)
+    """
+    permutations = tables(shape)[0]
+
+    # symmetries that leave board unchanged
+    stabilizer = [
+        perm
+        for perm in permutations[1:]
+        if all(board[i] == board[j] for i, j in enumerate(perm))
+    ]
+    if not stabilizer:
+        return None
+
+    return [
+        min([idx] + [perm[idx] for perm in stabilizer])
+        for idx in range(len(board))
+    ]
+
+
+def unique_moves(board: list, moves: list, shape=None) -> list:
+    """ Moves with symmetric duplicates on board removed """
+
+    reps = move_representatives(board, shape)
+    if reps is None:
+        return moves
+
+    return [move for move in moves if reps[move] == move]
@@ -16,7 +16,8 @@
 
 
 /* Function declarations */
-static PyObject *py__load_scores (PyObject *self, PyObject *args);
+static PyObject *py__load_scores  (PyObject *self, PyObject *args);
+static PyObject *py__timed_scores (PyObject *self, PyObject *args);
 
 
 /* Function Mapping Table*/
@@ -25,7 +26,13 @@ static PyMethodDef MiniMaxMethods[] = {
         "load_scores",
         py__load_scores,
         METH_VARARGS,
-        "Get the scores of all moves of board"
+        "Get the scores of all moves of board, halted once halted[0] is set"
+    },
+    {
+        "timed_scores",
+        py__timed_scores,
+        METH_VARARGS,
+        "Get (scores, depth) of moves of board, deepening within seconds"
     },
     {NULL, NULL, 0, NULL} // sentinel
 };
@@ -55,10 +62,19 @@ static PyObject *py__load_scores (PyObject *self, PyObject *args)
     PyObject *board;
     int       player;
     int       depth;
+    int       threads = 1;
+    int       margin  = 0;
+    Py_buffer halted  = {NULL, NULL};
 
-    /* Parse Arguments */
-    if (!PyArg_ParseTuple(args, "Oii", &board, &player, &depth))
+    /* Parse Arguments (threads, margin and halt flag optional) */
+    if (!PyArg_ParseTuple(args, "Oii|iiz*", &board, &player, &depth, &threads, &margin, &halted))
+        return NULL;
+    if (halted.buf != NULL && halted.len < 1)
+    {
+        PyBuffer_Release(&halted);
+        PyErr_SetString(PyExc_ValueError, "halted must hold a flag byte");
         return NULL;
+    }
 
     /* PyList -> C Array */
     int cboard[54];
@@ -67,9 +83,13 @@ static PyObject *py__load_scores (PyObject *self, PyObject *args)
         cboard[i] = (int)PyLong_AsLong(PyList_GetItem(board, i));
     }
 
-    /* Actual Stuff */
+    /* Actual Stuff (without GIL, lets pondering threads run) */
     int score_list[54] = {0};
-    minimax__load_scores(cboard, score_list, player, depth);
+    Py_BEGIN_ALLOW_THREADS
+    minimax__load_scores(cboard, score_list, player, depth, threads, margin, halted.buf);
+    Py_END_ALLOW_THREADS
+    if (halted.buf != NULL)
+        PyBuffer_Release(&halted);
 
     /* Build Python List */
     PyObject *py_score_list = PyList_New(54);
@@ -79,3 +99,51 @@ static PyObject *py__load_scores (PyObject *self, PyObject *args)
     }
     return py_score_list;
 }
+
+
+static PyObject *py__timed_scores (PyObject *self, PyObject *args)
+{
+    /* Expecting arguments */
+    PyObject *board;
+    int       player;
+    int       depth;
+    double    seconds;
+    int       threads = 1;
+    int       margin  = 0;
+    Py_buffer halted  = {NULL, NULL};
+
+    /* Parse Arguments (threads, margin and halt flag optional) */
+    if (!PyArg_ParseTuple(args, "Oiid|iiz*", &board, &player, &depth, &seconds, &threads, &margin, &halted))
+        return NULL;
+    if (halted.buf != NULL && halted.len < 1)
+    {
+        PyBuffer_Release(&halted);
+        PyErr_SetString(PyExc_ValueError, "halted must hold a flag byte");
+        return NULL;
+    }
+
+    /* PyList -> C Array */
+    int cboard[54];
+    for (int i = 0; i < 54; ++i)
+    {
+        cboard[i] = (int)PyLong_AsLong(PyList_GetItem(board, i));
+    }
+
+    /* Actual Stuff (without GIL, lets pondering threads run) */
+    int score_list[54] = {0};
+    int reached;
+    Py_BEGIN_ALLOW_THREADS
+    reached = minimax__timed_scores(cboard, score_list, player, depth, threads, margin, seconds, halted.buf);
+    Py_END_ALLOW_THREADS
+    if (halted.buf != NULL)
+        PyBuffer_Release(&halted);
+
+    /* Build Python List */
+    PyObject *py_score_list = PyList_New(54);
+    for (int i = 0; i < 54; ++i)
+    {
+        PyList_SetItem(py_score_list, i, PyLong_FromLong((long)score_list[i]));
+    }
+    return Py_BuildValue("(Ni)", py_score_list, reached);
+}
+
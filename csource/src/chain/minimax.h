@@ -7,12 +7,41 @@
  * ----------------------------------
  * Memory allocated array score_list
  * must be passed to store the values
+ * Root moves are split over threads
+ * Scores within margin of the best
+ * are exact, others are upper bounds
+ * Once *halted (if not NULL) is set,
+ * the search returns early with
+ * meaningless scores
  */
 void
-minimax__load_scores ( int  *board,
-                       int  *score_list,
-                       int   player,
-                       int   depth );
+minimax__load_scores ( int                  *board,
+                       int                  *score_list,
+                       int                   player,
+                       int                   depth,
+                       int                   threads,
+                       int                   margin,
+                       const volatile char  *halted );
+
+
+/**
+ * Load minimax scores within seconds
+ * ----------------------------------
+ * Deepens up to depth while the next
+ * iteration is expected to end within
+ * seconds (no limit if 0), returns the
+ * depth of the scores in score_list
+ * Halted as minimax__load_scores
+ */
+int
+minimax__timed_scores ( int                  *board,
+                        int                  *score_list,
+                        int                   player,
+                        int                   depth,
+                        int                   threads,
+                        int                   margin,
+                        double                seconds,
+                        const volatile char  *halted );
 
 
 #endif
\ No newline at end of file
@@ -1,3 +1,6 @@
+#include <pthread.h>
+#include <time.h>
+
 #include "chain/engine.h"
 #include "chain/minimax.h"
 
@@ -6,6 +9,18 @@
 static const int WIN_SCORE = +10000;
 static const int LOS_SCORE = -10000;
 
+/* plies of explosion moves searched beyond the horizon (0 disables) */
+static const int QUIESCENCE_DEPTH = 4;
+
+/* half width of root window around previous iteration's best score */
+static const int ASPIRATION_WINDOW = 8;
+
+/* upper limit of root search threads */
+#define MAX_THREADS 64
+
+/* halt flag of searches given none, never set */
+static const volatile char NOT_HALTED = 0;
+
 
 /* Critical Mass Lookup Table */
 static const char NTABLE [9 * 6] = {
@@ -22,10 +37,30 @@ static const char NTABLE [9 * 6] = {
 
 
 /* Static Function Declarations */
+static double minimax__seconds       (void);
 static int minimax__evaluation_score (int *, int);
+static int minimax__explosion_moves  (int *, int, int *);
+static int minimax__quiet_maximizer  (int *, int, int, int, int);
+static int minimax__quiet_minimizer  (int *, int, int, int, int);
 static int minimax__score_minimizer  (int *, int, int, int);
-static int minimax__pruned_minimizer (int *, int, int, int, int);
-static int minimax__pruned_maximizer (int *, int, int, int, int);
+static int minimax__pruned_minimizer (int *, int, int, int, int,
+                                      const volatile char *);
+static int minimax__pruned_maximizer (int *, int, int, int, int,
+                                      const volatile char *);
+static void *minimax__root_worker     (void *);
+static int minimax__root_search      (int (*)[54], int *, int, int *,
+                                      int, int, int, int, int, int,
+                                      const volatile char *);
+
+
+/* Seconds on a monotonic clock */
+static double
+minimax__seconds ( void )
+{
+    struct timespec now;
+    clock_gettime(CLOCK_MONOTONIC, &now);
+    return now.tv_sec + now.tv_nsec * 1e-9;
+}
 
 
 /* Heuristic Evaluation Functions (in favor of player) */
@@ -102,6 +137,115 @@ minimax__evaluation_score ( int  *board,
 }
 
 
+/* Moves of player that explode next to an enemy cell */
+static int
+minimax__explosion_moves ( int  *board,
+                           int   player,
+                           int  *moves )
+{
+    int psign = player ? -1 : 1;
+    int count = 0;
+
+    for (int i = 0; i < 54; ++i)
+    {
+        /* critical cells of player only */
+        if (board[i] * psign != NTABLE[i] - 1)
+            continue;
+
+        /* explosion captures an enemy cell */
+        int i_y = i / 6;
+        int i_x = i % 6;
+
+        if ((i_y > 0 && board[i - 6] * psign < 0) ||
+            (i_y < 8 && board[i + 6] * psign < 0) ||
+            (i_x > 0 && board[i - 1] * psign < 0) ||
+            (i_x < 5 && board[i + 1] * psign < 0))
+        {
+            moves[count++] = i;
+        }
+    }
+
+    return count;
+}
+
+
+/* Quiescence Maximizer Level (RECURSIVE over explosions) */
+static int
+minimax__quiet_maximizer ( int  *board,
+                           int   player,
+                           int   alpha,
+                           int   beta,
+                           int   depth )
+{
+    int moves[54];
+    int new_board[54];
+
+    /* standing pat on the static score */
+    int score = minimax__evaluation_score(board, player);
+    if (depth == 0 || score >= beta)
+        return score;
+    alpha = (alpha > score) ? alpha : score;
+
+    int count = minimax__explosion_moves(board, player, moves);
+    for (int k = 0; k < count; ++k)
+    {
+        /* Node search is done if game over */
+        if (engine__interact(board, new_board, moves[k], player))
+            return WIN_SCORE;
+
+        /* Get recursive score and maximize score and alpha */
+        int child_score = minimax__quiet_minimizer(new_board, player, alpha, beta, depth - 1);
+        score = (child_score > score) ? child_score : score;
+        alpha = (alpha > score) ? alpha : score;
+
+        /* Node search is done if alpha >= beta */
+        if (alpha >= beta)
+            return score;
+    }
+
+    return score;
+}
+
+
+/* Quiescence Minimizer Level (RECURSIVE over explosions) */
+static int
+minimax__quiet_minimizer ( int  *board,
+                           int   player,
+                           int   alpha,
+                           int   beta,
+                           int   depth )
+{
+    int enemy = 1 - player;
+    int moves[54];
+    int new_board[54];
+
+    /* standing pat on the static score */
+    int score = minimax__evaluation_score(board, player);
+    if (depth == 0 || score <= alpha)
+        return score;
+    beta = (beta < score) ? beta : score;
+
+    int count = minimax__explosion_moves(board, enemy, moves);
+    for (int k = 0; k < count; ++k)
+    {
+        /* Node search is done if game over */
+        if (engine__interact(board, new_board, moves[k], enemy))
+            return LOS_SCORE;
+
+        /* Get recursive score and minimize score and beta */
+        int child_score = minimax__quiet_maximizer(new_board, player, alpha, beta, depth - 1);
+        score = (child_score < score) ? child_score : score;
+        beta  = (beta < score) ? beta : score;
+
+        /* Node search is done if alpha >= beta */
+        if (alpha >= beta)
+            return score;
+    }
+
+    return score;
+}
+
+
 /* Direct Evaluation Minimizer Level */
 static int
 minimax__score_minimizer  ( int  *board,
@@ -127,8 +271,8 @@ minimax__score_minimizer  ( int  *board,
         if (engine__interact(board, new_board, i, enemy))
             return LOS_SCORE;
         
-        /* Get recursive score and minimize score and beta */
-        int child_score = minimax__evaluation_score(new_board, player);
+        /* Get score after explosions settle, minimize score and beta */
+        int child_score = minimax__quiet_maximizer(new_board, player, alpha, beta, QUIESCENCE_DEPTH);
         score = (child_score < score) ? child_score : score;
         beta  = (beta < score) ? beta : score;
 
@@ -144,11 +288,12 @@ minimax__score_minimizer  ( int  *board,
 
 /* Minimax Minimizer Level (RECURSIVE) */
 static int
-minimax__pruned_minimizer ( int  *board,
-                            int   player,
-                            int   alpha,
-                            int   beta,
-                            int   depth )
+minimax__pruned_minimizer ( int                  *board,
+                            int                   player,
+                            int                   alpha,
+                            int                   beta,
+                            int                   depth,
+                            const volatile char  *halted )
 {
     /* Assume worst case score and improve */
     int score = WIN_SCORE;
@@ -156,6 +301,12 @@ minimax__pruned_minimizer ( int  *board,
     int esign = enemy ? -1 : 1;
     int new_board[54];
 
+    int first = 1;
+
+    /* search was halted */
+    if (*halted)
+        return 0;
+
     /* maximum depth reached => return min of scores instead */
     if (depth == 0)
         return minimax__score_minimizer(board, player, alpha, beta);
@@ -171,9 +322,23 @@ minimax__pruned_minimizer ( int  *board,
         /* Node search is done if game over */
         if (engine__interact(board, new_board, i, enemy))
             return LOS_SCORE;
-        
-        /* Get recursive score and minimize score and beta */
-        int child_score = minimax__pruned_maximizer(new_board, player, alpha, beta, depth);
+
+        /* First child gets full window, others a null window (PVS) */
+        /* re-searched with full window if they turn out better */
+        int child_score;
+        if (first)
+        {
+            child_score = minimax__pruned_maximizer(new_board, player, alpha, beta, depth, halted);
+            first = 0;
+        }
+        else
+        {
+            child_score = minimax__pruned_maximizer(new_board, player, beta - 1, beta, depth, halted);
+            if (child_score > alpha && child_score < beta)
+                child_score = minimax__pruned_maximizer(new_board, player, alpha, beta, depth, halted);
+        }
+
+        /* minimize score and beta */
         score = (child_score < score) ? child_score : score;
         beta  = (beta < score) ? beta : score;
 
@@ -189,16 +354,18 @@ minimax__pruned_minimizer ( int  *board,
 
 /* Minimax Maximizer Level (RECURSIVE) */
 static int
-minimax__pruned_maximizer ( int  *board,
-                            int   player,
-                            int   alpha,
-                            int   beta,
-                            int   depth )
+minimax__pruned_maximizer ( int                  *board,
+                            int                   player,
+                            int                   alpha,
+                            int                   beta,
+                            int                   depth,
+                            const volatile char  *halted )
 {
     /* Assume worst case score and improve */
     int score = LOS_SCORE;
     int psign = player ? -1 : 1;
     int new_board[54];
+    int first = 1;
 
     /* more depth to explore */
     for (int i = 0; i < 54; ++i)
@@ -210,9 +377,23 @@ minimax__pruned_maximizer ( int  *board,
         /* Node search is done if game over */
         if (engine__interact(board, new_board, i, player))
             return WIN_SCORE;
-        
-        /* Get recursive score and maximize score and alpha */
-        int child_score = minimax__pruned_minimizer(new_board, player, alpha, beta, depth - 1);
+
+        /* First child gets full window, others a null window (PVS) */
+        /* re-searched with full window if they turn out better */
+        int child_score;
+        if (first)
+        {
+            child_score = minimax__pruned_minimizer(new_board, player, alpha, beta, depth - 1, halted);
+            first = 0;
+        }
+        else
+        {
+            child_score = minimax__pruned_minimizer(new_board, player, alpha, alpha + 1, depth - 1, halted);
+            if (child_score > alpha && child_score < beta)
+                child_score = minimax__pruned_minimizer(new_board, player, alpha, beta, depth - 1, halted);
+        }
+
+        /* maximize score and alpha */
         score = (child_score > score) ? child_score : score;
         alpha = (alpha > score) ? alpha : score;
 
@@ -226,18 +407,152 @@ minimax__pruned_maximizer ( int  *board,
 }
 
 
+/* Root moves of one iteration shared by search threads */
+typedef struct
+{
+    int  (*children)[54];
+    int   *order;
+    int    count;
+    int   *score_list;
+    int    player;
+    int    depth;
+    int    margin;
+    const volatile char *halted;
+
+    /* guarded by lock */
+    pthread_mutex_t lock;
+    int    next;
+    int    alpha;
+    int    beta;
+    int    best;
+} RootShare;
+
+
+/* Root Search Thread, takes root moves until none are left */
+static void *
+minimax__root_worker ( void  *arg )
+{
+    RootShare *share = (RootShare *)arg;
+
+    while (1)
+    {
+        /* next root move and best alpha found so far */
+        pthread_mutex_lock(&share->lock);
+        int k     = share->next++;
+        int alpha = share->alpha;
+        int beta  = share->beta;
+        pthread_mutex_unlock(&share->lock);
+
+        /* all moves taken, window was too low, or search was halted */
+        if (k >= share->count || alpha >= beta || *share->halted)
+            return NULL;
+
+        /* null window, re-searched with full window if better */
+        int i = share->order[k];
+        int score = minimax__pruned_minimizer(share->children[i], share->player, alpha, alpha + 1, share->depth - 1, share->halted);
+        if (score > alpha && score < beta)
+            score = minimax__pruned_minimizer(share->children[i], share->player, alpha, beta, share->depth - 1, share->halted);
+
+        /* store score and raise shared alpha, trailing best by margin + 1 */
+        pthread_mutex_lock(&share->lock);
+        share->score_list[i] = score;
+        share->best  = (share->best > score) ? share->best : score;
+        score = share->best - share->margin - 1;
+        share->alpha = (share->alpha > score) ? share->alpha : score;
+        pthread_mutex_unlock(&share->lock);
+    }
+}
+
+
+/* Root Level of one Iteration (PVS over ordered root moves) */
+/* First move is searched alone, the rest split over threads */
+/* Alpha trails the best score by margin + 1, so that moves within */
+/* margin of the best (inclusive) get exact scores */
+/* Returns best score, or stops early once it reaches beta */
+static int
+minimax__root_search ( int                 (*children)[54],
+                       int                  *order,
+                       int                   count,
+                       int                  *score_list,
+                       int                   player,
+                       int                   alpha,
+                       int                   beta,
+                       int                   depth,
+                       int                   threads,
+                       int                   margin,
+                       const volatile char  *halted )
+{
+    /* first move gets full window */
+    int first = order[0];
+    int score = minimax__pruned_minimizer(children[first], player, alpha, beta, depth - 1, halted);
+    score_list[first] = score;
+
+    RootShare share = {
+        .children   = children,
+        .order      = order,
+        .count      = count,
+        .score_list = score_list,
+        .player     = player,
+        .depth      = depth,
+        .margin     = margin,
+        .halted     = halted,
+        .next       = 1,
+        .alpha      = (alpha > score - margin - 1) ? alpha : score - margin - 1,
+        .beta       = beta,
+        .best       = score,
+    };
+    pthread_mutex_init(&share.lock, NULL);
+
+    /* helper threads, calling thread searches too */
+    pthread_t helpers[MAX_THREADS];
+    int spawned = 0;
+    for (int t = 1; t < threads && t < MAX_THREADS && t < count; ++t)
+    {
+        if (pthread_create(&helpers[spawned], NULL, minimax__root_worker, &share) == 0)
+            ++spawned;
+    }
+
+    minimax__root_worker(&share);
+    for (int t = 0; t < spawned; ++t)
+        pthread_join(helpers[t], NULL);
+
+    pthread_mutex_destroy(&share.lock);
+    return share.best;
+}
+
+
 /* Load scores of moves in an array */
 void 
-minimax__load_scores ( int  *board,
-                       int  *score_list,
-                       int   player,
-                       int   depth )
+minimax__load_scores ( int                  *board,
+                       int                  *score_list,
+                       int                   player,
+                       int                   depth,
+                       int                   threads,
+                       int                   margin,
+                       const volatile char  *halted )
+{
+    minimax__timed_scores(board, score_list, player, depth, threads, margin, 0.0, halted);
+}
+
+
+/* Load scores of moves in an array, deepening within seconds */
+/* Returns depth of the last completed iteration */
+int
+minimax__timed_scores ( int                  *board,
+                        int                  *score_list,
+                        int                   player,
+                        int                   depth,
+                        int                   threads,
+                        int                   margin,
+                        double                seconds,
+                        const volatile char  *halted )
 {
-    int alpha = LOS_SCORE;
     int psign = player ? -1 : 1;
-    int new_board[54];
+    int children[54][54];
+    int order[54];
+    int count = 0;
 
-    /* search all nodes (winning move stops search) */
+    /* expand root moves (winning move stops search) */
     for (int i = 0; i < 54; ++i)
     {
         /* skip invalid move after marking */
@@ -248,15 +563,75 @@ minimax__load_scores ( int  *board,
         }
 
         /* interact with board */
-        if (engine__interact(board, new_board, i, player))
+        if (engine__interact(board, children[i], i, player))
         {
             score_list[i] = WIN_SCORE;
-            return;
+            return 1;
         }
 
-        /* store score and update alpha */
-        int score = minimax__pruned_minimizer(new_board, player, alpha, WIN_SCORE, depth - 1);
-        score_list[i] = score;
-        alpha = (alpha > score) ? alpha : score;
+        order[count++] = i;
+    }
+
+    /* nothing to search */
+    if (count == 0)
+        return 1;
+
+    /* Iterative deepening, previous iteration orders root moves */
+    /* and centers an aspiration window on its best score, */
+    /* widened below by margin */
+    /* With a time limit, a deeper iteration starts only if it is */
+    /* expected to end in time, by the growth of the last one */
+    double start    = minimax__seconds();
+    double spent    = 0.0;
+    double previous = 0.0;
+    int    reached  = 0;
+
+    int guess = 0;
+    /* searches without halt flag are never halted */
+    if (halted == NULL)
+        halted = &NOT_HALTED;
+
+    for (int d = 1; d <= depth && !*halted; ++d)
+    {
+        if (seconds > 0 && d > 1)
+        {
+            double growth   = (previous > 0 && spent > previous) ? spent / previous : 1.0;
+            double estimate = (previous > 0) ? spent * growth : spent * count;
+            if (minimax__seconds() - start + estimate >= seconds)
+                break;
+        }
+        double begin = minimax__seconds();
+
+        int alpha = (d > 1) ? guess - ASPIRATION_WINDOW - margin : LOS_SCORE;
+        int beta  = (d > 1) ? guess + ASPIRATION_WINDOW : WIN_SCORE;
+
+        /* search again with full window if best, or the margin */
+        /* below it, is outside */
+        guess = minimax__root_search(children, order, count, score_list, player, alpha, beta, d, threads, margin, halted);
+        if (guess - margin <= alpha || guess >= beta)
+            guess = minimax__root_search(children, order, count, score_list, player, LOS_SCORE, WIN_SCORE, d, threads, margin, halted);
+
+        /* best moves first (stable insertion sort) */
+        for (int k = 1; k < count; ++k)
+        {
+            int move = order[k];
+            int j = k - 1;
+            while (j >= 0 && score_list[order[j]] < score_list[move])
+            {
+                order[j + 1] = order[j];
+                --j;
+            }
+            order[j + 1] = move;
+        }
+
+        previous = spent;
+        spent    = minimax__seconds() - begin;
+        reached  = d;
+
+        /* proven win needs no deeper search */
+        if (seconds > 0 && guess == WIN_SCORE)
+            break;
     }
-}
\ No newline at end of file
+
+    return reached;
+}
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+# system
+import argparse
+import asyncio
+import chain_reaction.server as server
+
+
+def get_args():
+    """ Function to parse all arguments """
+
+    # fmt: off
+    parser = argparse.ArgumentParser(description="Chain Reaction Server")
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8765,
+        help="TCP port to listen on",
+    )
+    parser.add_argument(
+        "--unix",
+        type=str,
+        default=None,
+        help="Listen on this Unix socket path instead",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=2,
+        help="Processes computing agent moves",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=5.0,
+        help="Default seconds per agent move",
+    )
+    parser.add_argument(
+        "--c-backend",
+        action="store_true",
+        help="Use c for processing",
+    )
+    args = parser.parse_args()
+    # fmt: on
+
+    return args
+
+
+def main():
+
+    # get args
+    args = get_args()
+
+    # parameters
+    shape = (9, 6)
+    backend = "c" if args.c_backend else "python"
+
+    # serve until interrupted
+    service = server.GameServer(shape, backend, args.workers, args.budget)
+    try:
+        asyncio.run(service.serve_forever("127.0.0.1", args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
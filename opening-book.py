@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+# system
+import argparse
+import time
+import chain_reaction.wrappers.book as book
+import chain_reaction.wrappers.engine as engine
+import chain_reaction.wrappers.minimax as minimax
+
+
+def get_args():
+    """ Function to parse all arguments """
+
+    # fmt: off
+    parser = argparse.ArgumentParser(description="Build opening book")
+    parser.add_argument(
+        "output",
+        type=str,
+        help="Path of book file to write",
+    )
+    parser.add_argument(
+        "--plies",
+        type=int,
+        default=4,
+        help="Number of opening plies covered",
+    )
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=3,
+        help="Minimax search depth for book positions",
+    )
+    parser.add_argument(
+        "--width",
+        type=int,
+        default=8,
+        help="Best replies followed from every position",
+    )
+    parser.add_argument(
+        "--c-backend",
+        action="store_true",
+        help="Use c for processing",
+    )
+    args = parser.parse_args()
+    # fmt: on
+
+    return args
+
+
+def main():
+
+    # get args
+    args = get_args()
+
+    # parameters
+    shape = (9, 6)
+    backend = "c" if args.c_backend else "python"
+
+    # initialize
+    engine.init(shape)
+    minimax.init(backend)
+
+    # search and write book
+    time_start = time.perf_counter()
+    count = book.build(
+        args.output, minimax.load_scores, args.plies, args.depth, args.width
+    )
+    time_taken = time.perf_counter() - time_start
+
+    print("Wrote %d positions in %.1fs" % (count, time_taken))
+
+
+if __name__ == "__main__":
+    main()
@@ -17,11 +17,11 @@ def main():
 
     # configurations
     config1 = {
-        "minimax": {"search_depth": 1, "randomness": 3},
+        "minimax": {"search_depth": 1, "margin": 5, "temperature": 4.0},
         "mcts": {"time_limit": 1.0, "c_param": 1.5},
     }
     config2 = {
-        "minimax": {"search_depth": 1, "randomness": 3},
+        "minimax": {"search_depth": 1, "margin": 5, "temperature": 4.0},
         "mcts": {"time_limit": 1.0, "c_param": 1.5},
     }
 
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+# system
+import argparse
+import time
+import chain_reaction.selfplay as selfplay
+import chain_reaction.wrappers.engine as engine
+
+
+def get_args():
+    """ Function to parse all arguments """
+
+    # fmt: off
+    parser = argparse.ArgumentParser(description="Generate self-play data")
+    parser.add_argument(
+        "directory",
+        type=str,
+        help="Directory to write chunk files into",
+    )
+    parser.add_argument(
+        "--games",
+        type=int,
+        default=100,
+        help="Number of games to play",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Number of worker processes",
+    )
+    parser.add_argument(
+        "--playouts",
+        type=int,
+        default=200,
+        help="MCTS playouts per move",
+    )
+    parser.add_argument(
+        "--cutoff",
+        type=int,
+        default=0,
+        help="Rollout length limit (0 for full games)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Base seed of workers",
+    )
+    parser.add_argument(
+        "--unpack",
+        type=str,
+        default=None,
+        help="Also unpack all chunks into this flat file",
+    )
+    args = parser.parse_args()
+    # fmt: on
+
+    return args
+
+
+def main():
+
+    # get args
+    args = get_args()
+
+    # parameters
+    shape = (9, 6)
+    engine.init(shape)
+
+    # play games
+    time_start = time.perf_counter()
+    count = selfplay.generate(
+        args.directory,
+        args.games,
+        args.workers,
+        seed=args.seed,
+        playouts=args.playouts,
+        cutoff=args.cutoff,
+    )
+    time_taken = time.perf_counter() - time_start
+    print("Wrote %d records in %.1fs" % (count, time_taken))
+
+    # flat file for training
+    if args.unpack:
+        selfplay.unpack(args.directory, args.unpack)
+
+
+if __name__ == "__main__":
+    main()
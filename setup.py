@@ -35,6 +35,8 @@ def c_extension_list():
             "csource/mod_minimaxagent.c",
         ],
         include_dirs=["csource/src"],
+        extra_compile_args=["-pthread"],
+        extra_link_args=["-pthread"],
     )
 
     return [MINIMAX_EXTN]
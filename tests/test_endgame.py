@@ -0,0 +1,42 @@
+import random
+
+import chain_reaction.backends.python.endgame_solver as solver
+import chain_reaction.wrappers.endgame as endgame
+import chain_reaction.wrappers.engine as engine
+
+
+def test_openings_are_skipped():
+    eng = engine.get_engine((9, 6))
+    rng = random.Random(0)
+    game = engine.ChainReactionGame(eng)
+    endgame.SOLVED.clear()
+
+    for _ in range(12):
+        board, player = game.board, game.player
+        args = (endgame.ENEMY_CELLS, endgame.CRITICAL_FRACTION)
+        assert not solver.is_endgame(board, player, *args, 1.0, eng)
+        assert endgame.best_move(board, player, eng) is None
+        psign = -1 if player else 1
+        moves = [x for x in range(len(board)) if board[x] * psign >= 0]
+        game.make_move(rng.choice(moves))
+
+    assert not endgame.SOLVED
+
+
+def test_solved_positions_evict_oldest(monkeypatch):
+    eng = engine.get_engine((3, 3))
+    monkeypatch.setattr(endgame, "CACHE_SIZE", 2)
+    endgame.SOLVED.clear()
+
+    # enemy holds one corner of a board full of the mover's orbs
+    boards = [
+        [1, 2, 1, 2, 3, 2, 1, 2, -1],
+        [1, 2, 1, 2, 3, 2, 1, 1, -1],
+        [1, 2, 1, 2, 2, 2, 1, 2, -1],
+    ]
+    for board in boards:
+        endgame.best_move(board, 0, eng)
+
+    assert len(endgame.SOLVED) <= 2
+    assert ((3, 3), tuple(boards[-1]), 0) in endgame.SOLVED
+    assert ((3, 3), tuple(boards[0]), 0) not in endgame.SOLVED
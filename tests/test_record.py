@@ -0,0 +1,32 @@
+import chain_reaction.wrappers.record as record
+
+
+def test_mixed_timings_round_trip():
+    game = record.GameRecord((9, 6))
+    game.append(3, 10)
+    game.append(4)
+    game.append(5, 7)
+
+    assert game.timings == [10, 0, 7]
+    assert game.stats is None
+
+    parsed = record.GameRecord.from_bytes(game.to_bytes())
+    assert parsed.moves == [3, 4, 5]
+    assert parsed.timings == [10, 0, 7]
+    assert parsed.stats is None
+
+
+def test_late_stats_round_trip():
+    game = record.GameRecord((5, 5))
+    game.append(0)
+    game.append(1, nodes=120)
+    game.append(2, 4)
+
+    assert game.timings == [0, 0, 4]
+    assert game.stats == [0, 120, 0]
+
+    parsed = record.GameRecord.from_text(game.to_text())
+    assert parsed.shape == (5, 5)
+    assert parsed.moves == [0, 1, 2]
+    assert parsed.timings == [0, 0, 4]
+    assert parsed.stats == [0, 120, 0]
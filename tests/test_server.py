@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+import chain_reaction.server as server
+
+
+@pytest.fixture(scope="module")
+def service():
+    service = server.GameServer((5, 5), "python", workers=1, budget=0.2)
+    yield service
+    service.close()
+
+
+def request(service, message):
+    return asyncio.run(service.handle(message))
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        5,
+        [1],
+        "new",
+        {"op": 3},
+        {"op": "new", "players": 5},
+        {"op": "new", "players": ["human", 7]},
+        {"op": "new", "configs": {}},
+        {"op": "new", "configs": [{}, {"minimax": 3}]},
+        {"op": "new", "configs": [{}, {"minimax": {"search_depth": "4"}}]},
+        {"op": "new", "shape": "ab"},
+        {"op": "new", "shape": [9.5, 6]},
+        {"op": "new", "shape": [1, 6]},
+        {"op": "new", "seed": [1]},
+        {"op": "new", "budget": True},
+        {"op": "state", "game": [1]},
+        {"op": "move", "game": 10 ** 6, "move": 0},
+    ],
+)
+def test_invalid_requests_get_errors(service, message):
+    sessions = len(service.sessions)
+    response = request(service, message)
+
+    assert response["ok"] is False
+    assert type(response["error"]) is str
+    assert len(service.sessions) == sessions
+
+
+def test_default_game_answers_moves(service):
+    response = request(service, {"op": "new"})
+    assert response["ok"] and response["player"] == 0
+
+    game = response["game"]
+    response = request(service, {"op": "move", "game": game, "move": 0})
+    assert response["ok"]
+    assert response["moves"][0] == 0 and len(response["moves"]) == 2
+    assert response["player"] == 0
+
+
+def test_failing_agent_plays_random_move(service):
+    configs = [{}, {"mcts": {"rollout": "unknown"}}]
+    message = {"op": "new", "players": ["human", "mcts"], "configs": configs}
+    response = request(service, message)
+
+    game = response["game"]
+    response = request(service, {"op": "move", "game": game, "move": 6})
+    assert response["ok"] and len(response["moves"]) == 2
+
+    response = request(service, {"op": "move", "game": game, "move": 18})
+    assert response["ok"] and len(response["moves"]) == 4
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+# system
+import argparse
+import json
+import chain_reaction.tournament as tournament
+
+
+def get_args():
+    """ Function to parse all arguments """
+
+    # fmt: off
+    parser = argparse.ArgumentParser(description="Match two agents")
+    parser.add_argument(
+        "player1",
+        type=str,
+        help="Agent under test - [random, mcts, minimax]",
+    )
+    parser.add_argument(
+        "player2",
+        type=str,
+        help="Baseline agent - [random, mcts, minimax]",
+    )
+    parser.add_argument(
+        "--config1",
+        type=json.loads,
+        default=None,
+        help="JSON config of player1, as in sample.py",
+    )
+    parser.add_argument(
+        "--config2",
+        type=json.loads,
+        default=None,
+        help="JSON config of player2, as in sample.py",
+    )
+    parser.add_argument(
+        "--pairs",
+        type=int,
+        default=500,
+        help="Most game pairs to play, colors swap within a pair",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Number of worker processes",
+    )
+    parser.add_argument(
+        "--elo0",
+        type=float,
+        default=0.0,
+        help="Elo of null hypothesis of SPRT",
+    )
+    parser.add_argument(
+        "--elo1",
+        type=float,
+        default=10.0,
+        help="Elo of alternative hypothesis of SPRT",
+    )
+    parser.add_argument(
+        "--no-sprt",
+        action="store_true",
+        help="Play all pairs instead of stopping early",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seed of the match",
+    )
+    parser.add_argument(
+        "--c-backend",
+        action="store_true",
+        help="Use c for minimax",
+    )
+    args = parser.parse_args()
+    # fmt: on
+
+    return args
+
+
+def print_summary(stats: dict):
+    """ One line progress report """
+    print(
+        "games %d  +%d -%d =%d  elo %.1f [%.1f, %.1f]  llr %.2f  %.2f games/s"
+        % (
+            stats["games"],
+            stats["wins"],
+            stats["losses"],
+            stats["draws"],
+            stats["elo"],
+            stats["elo_lower"],
+            stats["elo_upper"],
+            stats["llr"],
+            stats["games_per_second"],
+        ),
+        end="\r",
+    )
+
+
+def main():
+
+    # get args
+    args = get_args()
+
+    # parameters
+    shape = (9, 6)
+    backend = "c" if args.c_backend else "python"
+
+    # configurations
+    default = {
+        "minimax": {"search_depth": 1, "margin": 5, "temperature": 4.0},
+        "mcts": {"time_limit": 1.0, "c_param": 1.5},
+    }
+    configs = [args.config1 or default, args.config2 or default]
+    sprt = None
+    if not args.no_sprt:
+        sprt = tournament.SPRT(args.elo0, args.elo1)
+
+    # play match
+    stats = tournament.match(
+        [args.player1, args.player2],
+        configs,
+        args.pairs,
+        args.workers,
+        shape,
+        backend,
+        args.seed,
+        sprt,
+        print_summary,
+    )
+    print()
+
+    if stats["result"] == "H1":
+        print("%s is stronger by at least %g elo" % (args.player1, args.elo1))
+    elif stats["result"] == "H0":
+        print("%s is not stronger by %g elo" % (args.player1, args.elo1))
+    else:
+        print("No result within %d games" % stats["games"])
+
+
+if __name__ == "__main__":
+    main()